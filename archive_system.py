@@ -0,0 +1,192 @@
+import asyncio
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+try:
+    from astrbot.api import logger
+except ImportError:
+    class DummyLogger:
+        def info(self, msg):
+            print(f"[INFO] {msg}")
+
+        def warning(self, msg):
+            print(f"[WARNING] {msg}")
+
+        def error(self, msg):
+            print(f"[ERROR] {msg}")
+    logger = DummyLogger()
+
+# --- 归档参数 ---
+ARCHIVED_TABLES = ("inventory", "pets")  # 先移动背包，条件中仍需引用 pets
+# 只看主人自己的指令刷新的活跃时间，其他玩家的查看与对决不会让宠物保持活跃
+INACTIVE_CONDITION = "COALESCE(last_active_time, last_updated_time, last_fed_time, '') < ?"
+ARCHIVE_BATCH_SIZE = 500  # 每个事务归档的宠物数，避免长时间持有写锁
+# 移动数据依赖 DELETE ... RETURNING，需要 SQLite 3.35.0 及以上
+MIN_SQLITE_VERSION = (3, 35, 0)
+
+class PetArchiver:
+    """
+    冷热分层归档。
+    长期不活跃的宠物连同背包一起移动到独立的归档库 pets_archive.db，
+    主库的群内扫描、索引与备份只包含活跃玩家；玩家回归时由 _get_pet 在同一事务内恢复。
+    定期归档在线程池中分批执行，不阻塞事件循环。
+    """
+    def __init__(self, plugin, inactive_days: int = 60, interval_hours: float = 24.0):
+        self.plugin = plugin
+        self.archive_path = plugin.data_dir / "pets_archive.db"
+        self.inactive_days = inactive_days
+        self.interval_hours = interval_hours
+        self._task: asyncio.Task | None = None
+        self.supported = sqlite3.sqlite_version_info >= MIN_SQLITE_VERSION
+        # 每个线程一个只读连接，用于在挂载归档库之前判断玩家是否有归档记录
+        self._probe = threading.local()
+        if not self.supported and inactive_days > 0:
+            logger.warning(f"SQLite {sqlite3.sqlite_version} 不支持 DELETE ... RETURNING，定期归档不会启动。")
+
+    def attach(self, conn):
+        """把归档库挂载为 archive，并按主库的表结构建表；已挂载时直接返回。"""
+        attached = {row[1] for row in conn.execute("PRAGMA database_list").fetchall()}
+        if "archive" in attached:
+            return
+        conn.execute("ATTACH DATABASE ? AS archive", (str(self.archive_path),))
+        for table in ARCHIVED_TABLES:
+            row = conn.execute("SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?",
+                               (table,)).fetchone()
+            ddl = re.sub(rf'^CREATE TABLE\s+"?{table}"?', f"CREATE TABLE IF NOT EXISTS archive.{table}", row[0])
+            conn.execute(ddl)
+
+    def _move_rows(self, conn, table: str, source: str, target: str, where: str, params: tuple) -> int:
+        """按列名把 source 库中满足条件的行移动到 target 库的同名表，返回移动的行数。"""
+        cursor = conn.execute(f"DELETE FROM {source}.{table} WHERE {where} RETURNING *", params)
+        rows = cursor.fetchall()
+        if not rows:
+            return 0
+
+        # 两边的表结构可能因迁移而不同，只复制同名的列
+        target_columns = {row[1] for row in conn.execute(f"PRAGMA {target}.table_info({table})").fetchall()}
+        names = [column[0] for column in cursor.description]
+        keep = [i for i, name in enumerate(names) if name in target_columns]
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {target}.{table} ({', '.join(names[i] for i in keep)}) "
+            f"VALUES ({', '.join('?' * len(keep))})",
+            [tuple(row[i] for i in keep) for row in rows])
+        return len(rows)
+
+    def archive_inactive(self, inactive_days: int | None = None) -> tuple[int, int]:
+        """
+        归档超过指定天数未活跃的宠物，返回 (宠物数, 背包条目数)。
+        每批在独立的事务中移动，运行在线程池中时使用自己的连接，不占用 tick 共享连接。
+        """
+        days = self.inactive_days if inactive_days is None else inactive_days
+        cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+        # 同一事务内两次执行的子查询选中同一批宠物
+        batch = (f"(user_id, group_id) IN (SELECT user_id, group_id FROM main.pets "
+                 f"WHERE {INACTIVE_CONDITION} LIMIT {ARCHIVE_BATCH_SIZE})")
+        pets = items = 0
+        while True:
+            with self.plugin.pet_system._connect() as conn:
+                self.attach(conn)
+                items += self._move_rows(conn, "inventory", "main", "archive", batch, (cutoff,))
+                moved = self._move_rows(conn, "pets", "main", "archive", batch, (cutoff,))
+                conn.commit()
+            pets += moved
+            if moved < ARCHIVE_BATCH_SIZE:
+                return pets, items
+
+    async def run_archive(self, inactive_days: int | None = None) -> tuple[int, int]:
+        """在线程池中执行归档，完成后在事件循环中清理随机对决的候选缓存。"""
+        pets, items = await asyncio.get_running_loop().run_in_executor(None, self.archive_inactive, inactive_days)
+        if pets:
+            # 被归档的玩家不应再出现在随机对决的候选缓存中
+            self.plugin.battle_system._duel_candidates.clear()
+        return pets, items
+
+    def _probe_query(self, sql: str, params: tuple) -> list[tuple]:
+        """通过当前线程的只读连接查询归档库，无需挂载；归档库不存在或尚未建表时返回空列表。"""
+        if not self.archive_path.exists():
+            return []
+        probe = getattr(self._probe, "conn", None)
+        if probe is None:
+            probe = self._probe.conn = sqlite3.connect(f"file:{self.archive_path}?mode=ro", uri=True)
+        try:
+            return probe.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            if "no such table" in str(e):
+                return []
+            raise
+
+    def _has_archived(self, user_id: str, group_id: str) -> bool:
+        """按主键查找归档记录，未命中时无需挂载归档库。"""
+        return bool(self._probe_query("SELECT 1 FROM pets WHERE user_id = ? AND group_id = ?",
+                                      (int(user_id), int(group_id))))
+
+    def restore(self, conn, user_id: str, group_id: str) -> bool:
+        """在调用方的事务中把归档的宠物及其背包移回主库，返回是否找到了归档记录。"""
+        # 主库未命中（包括每次领养）时先做廉价的存在性检查
+        if not self._has_archived(user_id, group_id):
+            return False
+        self.attach(conn)
+        key = (int(user_id), int(group_id))
+        if not self._move_rows(conn, "pets", "archive", "main", "user_id = ? AND group_id = ?", key):
+            return False
+        self._move_rows(conn, "inventory", "archive", "main", "user_id = ? AND group_id = ?", key)
+        return True
+
+    def counts(self) -> dict[str, int]:
+        """返回主库与归档库中的宠物数量。"""
+        with self.plugin.pet_system._connect() as conn:
+            self.attach(conn)
+            return {
+                "active": conn.execute("SELECT COUNT(*) FROM main.pets").fetchone()[0],
+                "archived": conn.execute("SELECT COUNT(*) FROM archive.pets").fetchone()[0],
+            }
+
+    def ensure_started(self):
+        """在事件循环中启动定期归档任务，未配置归档时不启动。"""
+        if self.inactive_days <= 0 or self.interval_hours <= 0:
+            return
+        if not self.supported:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._archive_loop())
+
+    async def _archive_loop(self):
+        while True:
+            try:
+                pets, items = await self.run_archive()
+                if pets:
+                    logger.info(f"已归档 {pets} 只超过 {self.inactive_days} 天未活跃的宠物，背包条目 {items} 条。")
+            except sqlite3.Error as e:
+                logger.error(f"归档不活跃宠物时发生错误: {e}")
+            await asyncio.sleep(self.interval_hours * 3600)
+
+    async def archive_command(self, event: object, action: str = "状态", inactive_days: int = -1):
+        """管理员手动归档或查看归档状态"""
+        if action == "执行":
+            if not self.supported:
+                yield event.plain_result(f"当前 SQLite 版本 {sqlite3.sqlite_version} 过低，归档需要 3.35.0 及以上。")
+                return
+            days = inactive_days if inactive_days > 0 else self.inactive_days
+            if days <= 0:
+                yield event.plain_result("请指定大于 0 的不活跃天数。")
+                return
+            pets, items = await self.run_archive(days)
+            yield event.plain_result(f"已归档 {pets} 只超过 {days} 天未活跃的宠物，背包条目 {items} 条。")
+            return
+
+        counts = self.counts()
+        schedule = (f"每 {self.interval_hours:g} 小时归档超过 {self.inactive_days} 天未活跃的宠物"
+                    if self.inactive_days > 0 and self.interval_hours > 0 else "未开启定期归档")
+        yield event.plain_result(
+            f"活跃宠物: {counts['active']} 只\n已归档宠物: {counts['archived']} 只\n{schedule}\n归档库: {self.archive_path}")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        probe = getattr(self._probe, "conn", None)
+        if probe is not None:
+            probe.close()
+            self._probe.conn = None
@@ -0,0 +1,183 @@
+"""
+基于 NumPy 的蒙特卡洛对战模拟器。
+
+按 `BattleSystem._run_battle` 的规则对成批的对局做向量化模拟，
+用于平衡性调参（不同种族、等级、进化阶段之间的胜率矩阵），
+并提供 `predict_win_rate(pet1, pet2)` 供对决与匹配功能低成本地调用。
+
+用法（在插件目录的上一级执行）：
+    python -m astrbot_plugin_pet.battle_simulator --levels 1,10,20,30,40 --battles 20000
+"""
+import argparse
+import time
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .pet_system import (PET_TYPES, ATTRIBUTE_EFFECTIVENESS, ADVANTAGE_MULTIPLIER, DISADVANTAGE_MULTIPLIER,
+                         LEVEL_UP_STAT_GAIN, EVOLUTION_STAT_GAIN)
+
+NUMPY_AVAILABLE = np is not None
+
+_rng = np.random.default_rng() if NUMPY_AVAILABLE else None
+
+
+def attribute_multiplier(attacker_attr: str, defender_attr: str,
+                         advantage: float = ADVANTAGE_MULTIPLIER, disadvantage: float = DISADVANTAGE_MULTIPLIER) -> float:
+    """与 BattleSystem._get_attribute_multiplier 相同的属性克制倍率。"""
+    if ATTRIBUTE_EFFECTIVENESS.get(attacker_attr) == defender_attr:
+        return advantage
+    if ATTRIBUTE_EFFECTIVENESS.get(defender_attr) == attacker_attr:
+        return disadvantage
+    return 1.0
+
+
+def simulate_battles(hp1, atk1, def1, hp2, atk2, def2, mult12, mult21, rng=None):
+    """
+    向量化地模拟一批对局，返回宠物1是否获胜的布尔数组。
+    所有参数都可以是标量或等长数组；回合顺序与伤害取整方式与 _run_battle 保持一致。
+    """
+    rng = rng or _rng
+    arrays = np.broadcast_arrays(
+        *(np.asarray(value, dtype=np.float64) for value in (hp1, atk1, def1, hp2, atk2, def2, mult12, mult21)))
+    shape = arrays[0].shape
+    hp1, atk1, def1, hp2, atk2, def2, mult12, mult21 = (array.ravel() for array in arrays)
+    hp1 = hp1.astype(np.int64)
+    hp2 = hp2.astype(np.int64)
+
+    # 只对仍在进行中的对局继续计算
+    active = np.arange(hp1.size)
+    while active.size:
+        # 宠物1攻击
+        roll = rng.uniform(0.8, 1.2, active.size)
+        base = np.maximum(1, np.trunc(atk1[active] * roll - def2[active] * 0.5))
+        hp2[active] -= np.trunc(base * mult12[active]).astype(np.int64)
+        active = active[hp2[active] > 0]
+        if not active.size:
+            break
+
+        # 宠物2反击
+        roll = rng.uniform(0.8, 1.2, active.size)
+        base = np.maximum(1, np.trunc(atk2[active] * roll - def1[active] * 0.5))
+        hp1[active] -= np.trunc(base * mult21[active]).astype(np.int64)
+        active = active[hp1[active] > 0]
+
+    return (hp1 > 0).reshape(shape)
+
+
+def sample_stats(pet_type: str, level: int, evolution_stage: int, n: int, rng=None,
+                 level_gain: tuple[int, int] = LEVEL_UP_STAT_GAIN,
+                 evolution_gain: tuple[int, int] = EVOLUTION_STAT_GAIN):
+    """按升级与进化的随机成长规则，抽样出 n 只指定种族/等级/阶段宠物的攻防。"""
+    rng = rng or _rng
+    initial = PET_TYPES[pet_type]['initial_stats']
+    low, high = level_gain
+    ups = max(0, level - 1)
+    attack = initial['attack'] + rng.integers(low, high + 1, (n, ups)).sum(axis=1) if ups else np.full(n, initial['attack'])
+    defense = initial['defense'] + rng.integers(low, high + 1, (n, ups)).sum(axis=1) if ups else np.full(n, initial['defense'])
+    for _ in range(1, evolution_stage):
+        attack = attack + rng.integers(evolution_gain[0], evolution_gain[1] + 1, n)
+        defense = defense + rng.integers(evolution_gain[0], evolution_gain[1] + 1, n)
+    return attack, defense
+
+
+def win_rate_matrix(levels=(1, 10, 20, 30, 40), stages=(1, 2), battles: int = 5000, satiety: int = 80,
+                    advantage: float = ADVANTAGE_MULTIPLIER, disadvantage: float = DISADVANTAGE_MULTIPLIER,
+                    rng=None):
+    """
+    计算 (种族, 等级, 进化阶段) 网格上两两对战的胜率矩阵。
+    返回 (labels, matrix)，matrix[i, j] 表示 labels[i] 作为挑战者击败 labels[j] 的概率。
+    未达到进化等级的组合会被跳过。
+    """
+    rng = rng or _rng
+    labels = []
+    for pet_type, info in PET_TYPES.items():
+        for level in levels:
+            for stage in stages:
+                previous = info['evolutions'].get(stage - 1)
+                if stage not in info['evolutions'] or (previous and level < previous['evolve_level']):
+                    continue
+                labels.append((pet_type, level, stage))
+
+    k = len(labels)
+    attacks = np.empty((k, battles))
+    defenses = np.empty((k, battles))
+    hps = np.empty(k)
+    attrs = []
+    for i, (pet_type, level, stage) in enumerate(labels):
+        attacks[i], defenses[i] = sample_stats(pet_type, level, stage, battles, rng)
+        hps[i] = level * 10 + satiety
+        attrs.append(PET_TYPES[pet_type]['attribute'])
+    mult = np.array([[attribute_multiplier(a, b, advantage, disadvantage) for b in attrs] for a in attrs])
+
+    # 每个挑战者一行，一次性模拟它与所有对手的全部对局
+    matrix = np.empty((k, k))
+    for i in range(k):
+        wins = simulate_battles(
+            hps[i], attacks[i][None, :], defenses[i][None, :],
+            hps[:, None], attacks, defenses,
+            mult[i][:, None], mult[:, i][:, None], rng)
+        matrix[i] = wins.mean(axis=1)
+    return labels, matrix
+
+
+def _pet_key(pet: dict) -> tuple:
+    return (pet['pet_type'], pet['level'], pet['attack'], pet['defense'], pet['satiety'])
+
+
+@lru_cache(maxsize=4096)
+def _predict_cached(key1: tuple, key2: tuple, battles: int) -> float:
+    type1, level1, atk1, def1, satiety1 = key1
+    type2, level2, atk2, def2, satiety2 = key2
+    attr1 = PET_TYPES[type1]['attribute']
+    attr2 = PET_TYPES[type2]['attribute']
+    wins = simulate_battles(
+        np.full(battles, level1 * 10 + satiety1), atk1, def1,
+        level2 * 10 + satiety2, atk2, def2,
+        attribute_multiplier(attr1, attr2), attribute_multiplier(attr2, attr1))
+    return float(wins.mean())
+
+
+def predict_win_rate(pet1: dict, pet2: dict, battles: int = 2000) -> float | None:
+    """
+    预测 pet1 作为先手挑战 pet2 的胜率。
+    结果按双方的战斗相关属性缓存；未安装 NumPy 时返回 None。
+    """
+    if not NUMPY_AVAILABLE:
+        return None
+    return _predict_cached(_pet_key(pet1), _pet_key(pet2), battles)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="宠物对战蒙特卡洛模拟器")
+    parser.add_argument("--levels", type=str, default="1,10,20,30,40", help="等级网格，逗号分隔")
+    parser.add_argument("--stages", type=str, default="1,2", help="进化阶段网格，逗号分隔")
+    parser.add_argument("--battles", type=int, default=5000, help="每组对局的模拟次数")
+    parser.add_argument("--satiety", type=int, default=80, help="双方的饱食度（影响初始HP）")
+    parser.add_argument("--advantage", type=float, default=ADVANTAGE_MULTIPLIER, help="克制倍率")
+    parser.add_argument("--disadvantage", type=float, default=DISADVANTAGE_MULTIPLIER, help="被克制倍率")
+    args = parser.parse_args(argv)
+
+    if not NUMPY_AVAILABLE:
+        raise SystemExit("对战模拟器需要安装 numpy。")
+
+    levels = [int(value) for value in args.levels.split(",")]
+    stages = [int(value) for value in args.stages.split(",")]
+    start = time.perf_counter()
+    labels, matrix = win_rate_matrix(levels, stages, args.battles, args.satiety, args.advantage, args.disadvantage)
+    elapsed = time.perf_counter() - start
+    total = len(labels) ** 2 * args.battles
+    print(f"模拟 {total} 场对局，耗时 {elapsed:.2f}s（{total / elapsed:,.0f} 场/秒）")
+
+    names = [f"{PET_TYPES[t]['evolutions'][s]['name']}Lv{l}" for t, l, s in labels]
+    width = max(len(name) for name in names) + 2
+    print(" " * width + "".join(f"{i:>6}" for i in range(len(names))))
+    for i, name in enumerate(names):
+        print(f"{i:>3} {name:<{width - 4}}" + "".join(f"{rate:>6.2f}" for rate in matrix[i]))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,46 @@
-import sqlite3
 import random
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
+from pathlib import Path
+
+try:
+    from astrbot.api.event import AstrMessageEvent
+    from astrbot.core.message.components import At
+except ImportError:
+    # 脱离 AstrBot 运行（例如压力测试工具）时使用的最小替代
+    AstrMessageEvent = object
+
+    class At:
+        def __init__(self, qq):
+            self.qq = qq
 
 # 引入宠物类型数据
-from .pet_system import PET_TYPES
+from .pet_system import (PET_TYPES, ATTRIBUTE_EFFECTIVENESS, ADVANTAGE_MULTIPLIER, DISADVANTAGE_MULTIPLIER,
+                         VersionConflict)
+from .battle_simulator import predict_win_rate
+from .cooldown_system import COOLDOWNS
+
+# --- 对决参数 ---
+WALK_COOLDOWN = COOLDOWNS["walk"]
+DUEL_COOLDOWN = COOLDOWNS["duel"]
+RANDOM_DUEL_LEVEL_BAND = 5  # 随机对决只匹配等级相差不超过该值的对手
+RANDOM_DUEL_CACHE_TTL = 30  # 候选对手缓存的有效秒数
+RANDOM_DUEL_SAMPLE_SIZE = 3  # 从候选中抽取若干只，挑选胜率最接近五五开的对手
 
 class BattleSystem:
     def __init__(self, plugin):
         self.plugin = plugin
         self.db_path = plugin.db_path
+        # 随机对决的候选缓存: (group_id, 最低等级, 最高等级) -> (过期时间, 可对决的user_id集合)
+        self._duel_candidates: dict[tuple[int, int, int], tuple[float, set[str]]] = {}
         
     def _get_attribute_multiplier(self, attacker_attr: str, defender_attr: str) -> float:
         """根据攻击方和防御方的属性，计算伤害倍率。"""
-        effectiveness = {
-            "金": "木",  # 金克木
-            "木": "土",  # 木克土
-            "土": "水",  # 土克水
-            "水": "火",  # 水克火
-            "火": "金"   # 火克金
-        }
+        effectiveness = ATTRIBUTE_EFFECTIVENESS
         if effectiveness.get(attacker_attr) == defender_attr:
-            return 1.2  # 克制，伤害加成20%
+            return ADVANTAGE_MULTIPLIER  # 克制，伤害加成20%
         if effectiveness.get(defender_attr) == attacker_attr:
-            return 0.8  # 被克制，伤害减少20%
+            return DISADVANTAGE_MULTIPLIER  # 被克制，伤害减少20%
         return 1.0  # 无克制关系
         
     def _run_battle(self, pet1: dict, pet2: dict) -> tuple[list[str], str]:
@@ -80,20 +98,25 @@ class BattleSystem:
         
     async def walk_pet(self, event: AstrMessageEvent):
         """带宠物散步，触发随机事件或PVE战斗"""
-        from astrbot.api.event import AstrMessageEvent
-        
         user_id, group_id = event.get_sender_id(), event.get_group_id()
         if not group_id:
             return
 
-        pet = self.plugin.pet_system._get_pet(user_id, group_id)
+        # 先查内存中的冷却表，冷却中的请求无需读取数据库
+        tracker = self.plugin.cooldown_tracker
+        if not tracker.is_ready("walk", user_id, group_id):
+            remaining = tracker.remaining("walk", user_id, group_id)
+            yield event.plain_result(f"刚散步回来，让宠物休息一下吧，还需等待 {str(remaining).split('.')[0]}。")
+            return
+
+        pet = await self.plugin.pet_system._get_pet(user_id, group_id)
         if not pet:
             yield event.plain_result("你还没有宠物，不能去散步哦。")
             return
 
         now = datetime.now()
         last_walk = datetime.fromisoformat(pet['last_walk_time'])
-        if now - last_walk < timedelta(minutes=5):
+        if now - last_walk < WALK_COOLDOWN:
             yield event.plain_result(f"刚散步回来，让「{pet['pet_name']}」休息一下吧。")
             return
 
@@ -122,19 +145,19 @@ class BattleSystem:
             if money_gain > 0:
                 final_reply.append(f"意外之喜！你在路边捡到了 ${money_gain}！")
 
-            with sqlite3.connect(self.db_path) as conn:
-                update_query = (
-                    f"UPDATE pets SET "
-                    f"{reward_type} = {'MIN(100, ' + reward_type + ' + ?)' if reward_type != 'exp' else (reward_type + ' + ?')}, "
-                    f"money = money + ?, "
-                    f"last_walk_time = ? "
-                    f"WHERE user_id = ? AND group_id = ?"
-                )
-                conn.execute(update_query, (reward_value, money_gain, now.isoformat(), int(user_id), int(group_id)))
-                conn.commit()
+            set_clause = (
+                f"{reward_type} = {'MIN(100, ' + reward_type + ' + ?)' if reward_type != 'exp' else (reward_type + ' + ?')}, "
+                f"money = money + ?"
+            )
+            if not await self._commit_walk(user_id, group_id, pet, now, set_clause, (reward_value, money_gain)):
+                yield event.plain_result(f"刚散步回来，让「{pet['pet_name']}」休息一下吧。")
+                return
+
+            self.plugin.economy_ledger.record(user_id, group_id, "walk_reward", money_delta=money_gain,
+                                              exp_delta=reward_value if reward_type == 'exp' else 0)
 
             if reward_type == 'exp':
-                final_reply.extend(self.plugin.pet_system._check_level_up(user_id, group_id))
+                final_reply.extend(await self.plugin.pet_system._check_level_up(user_id, group_id))
         else:
             # 遭遇野生宠物PVE战斗
             npc_level = max(1, pet['level'] + random.randint(-1, 1))
@@ -162,20 +185,32 @@ class BattleSystem:
                 exp_gain = 1
                 final_reply.append(f"\n很遗憾，你的宠物战败了，但也获得了 {exp_gain} 点经验。")
 
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute(
-                    "UPDATE pets SET exp = exp + ?, money = money + ?, last_walk_time = ? WHERE user_id = ? AND group_id = ?",
-                    (exp_gain, money_gain, now.isoformat(), int(user_id), int(group_id)))
-                conn.commit()
-            final_reply.extend(self.plugin.pet_system._check_level_up(user_id, group_id))
+            if not await self._commit_walk(user_id, group_id, pet, now, "exp = exp + ?, money = money + ?",
+                                     (exp_gain, money_gain)):
+                yield event.plain_result(f"刚散步回来，让「{pet['pet_name']}」休息一下吧。")
+                return
+            self.plugin.economy_ledger.record(user_id, group_id, "walk_battle", money_delta=money_gain,
+                                              exp_delta=exp_gain)
+            final_reply.extend(await self.plugin.pet_system._check_level_up(user_id, group_id))
 
+        tracker.mark("walk", user_id, group_id, now)
         yield event.plain_result("\n".join(final_reply))
         
+    async def _commit_walk(self, user_id: str, group_id: str, pet: dict, now: datetime, set_clause: str,
+                           params: tuple) -> bool:
+        """以乐观并发写入散步奖励与散步时间，其他实例已抢先完成本轮散步时返回 False。"""
+        def build(current: dict):
+            if now - datetime.fromisoformat(current['last_walk_time']) < WALK_COOLDOWN:
+                return None
+            return f"{set_clause}, last_walk_time = ?", (*params, now.isoformat())
+
+        try:
+            return await self.plugin.pet_system._versioned_update(user_id, group_id, pet, build) is not None
+        except VersionConflict:
+            return False
+
     async def duel_pet(self, event: AstrMessageEvent):
         """与其他群友的宠物进行对决"""
-        from astrbot.core.platform.sources.aiocqhttp.aiocqhttp_message_event import AiocqhttpMessageEvent
-        from astrbot.core.message.components import At
-        
         user_id, group_id = event.get_sender_id(), event.get_group_id()
         if not group_id:
             yield event.plain_result("该功能仅限群聊使用哦。")
@@ -192,7 +227,14 @@ class BattleSystem:
             yield event.plain_result("请@一位你想对决的群友。用法: /对决 @某人")
             return
 
-        challenger_pet = self.plugin.pet_system._get_pet(user_id, group_id)
+        # 先查内存中的冷却表，冷却中的请求无需读取数据库
+        tracker = self.plugin.cooldown_tracker
+        if not tracker.is_ready("duel", user_id, group_id):
+            remaining = tracker.remaining("duel", user_id, group_id)
+            yield event.plain_result(f"你的对决技能正在冷却中，还需等待 {str(remaining).split('.')[0]}。")
+            return
+
+        challenger_pet = await self.plugin.pet_system._get_pet(user_id, group_id)
         if not challenger_pet:
             yield event.plain_result("你还没有宠物，无法发起对决。")
             return
@@ -202,7 +244,14 @@ class BattleSystem:
             yield event.plain_result("不能和自己对决哦。")
             return
 
-        target_pet = self.plugin.pet_system._get_pet(target_id, group_id)
+        if not tracker.is_ready("duel", target_id, group_id):
+            remaining = tracker.remaining("duel", target_id, group_id)
+            yield event.plain_result(
+                f"对方的宠物正在休息，还需等待 {str(remaining).split('.')[0]} 才能接受对决。")
+            return
+
+        # 对方已归档的宠物不会因为被@而恢复
+        target_pet = await self.plugin.pet_system._get_pet(target_id, group_id, restore_archived=False)
         if not target_pet:
             yield event.plain_result(f"对方还没有宠物呢。")
             return
@@ -211,19 +260,36 @@ class BattleSystem:
 
         # 检查挑战者自己的CD
         last_duel_challenger = datetime.fromisoformat(challenger_pet['last_duel_time'])
-        if now - last_duel_challenger < timedelta(minutes=30):
-            remaining = timedelta(minutes=30) - (now - last_duel_challenger)
+        if now - last_duel_challenger < DUEL_COOLDOWN:
+            remaining = DUEL_COOLDOWN - (now - last_duel_challenger)
             yield event.plain_result(f"你的对决技能正在冷却中，还需等待 {str(remaining).split('.')[0]}。")
             return
 
         # 检查被挑战者的CD
         last_duel_target = datetime.fromisoformat(target_pet['last_duel_time'])
-        if now - last_duel_target < timedelta(minutes=30):
-            remaining = timedelta(minutes=30) - (now - last_duel_target)
+        if now - last_duel_target < DUEL_COOLDOWN:
+            remaining = DUEL_COOLDOWN - (now - last_duel_target)
             yield event.plain_result(
                 f"对方的宠物正在休息，还需等待 {str(remaining).split('.')[0]} 才能接受对决。")
             return
 
+        final_reply, winner_name, summary = await self._settle_duel(user_id, target_id, group_id, challenger_pet,
+                                                              target_pet, now)
+        yield event.plain_result("\n".join(final_reply))
+
+        card = await self.plugin.render_service.render_battle_card(group_id, user_id, challenger_pet, target_pet,
+                                                                    winner_name, summary)
+        if isinstance(card, Path):
+            yield event.image_result(str(card))
+
+    async def _settle_duel(self, user_id: str, target_id: str, group_id: str, challenger_pet: dict, target_pet: dict,
+                           now: datetime) -> tuple[list[str], str, list[str]]:
+        """
+        执行对决并结算双方的冷却、金钱与经验，返回 (对决战报, 胜利者名字, 用于结果卡的结算摘要)。
+        双方的冷却时间只在仍等于读取时的值时才会写入，其他实例抢先完成了涉及任一方的对决时
+        整个结算回滚并抛出 VersionConflict。
+        """
+        win_rate = predict_win_rate(challenger_pet, target_pet)
         battle_log, winner_name = self._run_battle(challenger_pet, target_pet)
 
         money_gain = 20
@@ -237,28 +303,136 @@ class BattleSystem:
             loser_exp = 5 + target_pet['level']
 
         final_reply = list(battle_log)
-        final_reply.append(
-            f"\n对决结算：胜利者获得了 {winner_exp} 点经验值和 ${money_gain}，参与者获得了 {loser_exp} 点经验值。")
-
-        with sqlite3.connect(self.db_path) as conn:
-            # 为双方都设置冷却时间
-            conn.execute("UPDATE pets SET last_duel_time = ? WHERE user_id = ? AND group_id = ?",
-                         (now.isoformat(), int(user_id), int(group_id)))
-            conn.execute("UPDATE pets SET last_duel_time = ? WHERE user_id = ? AND group_id = ?",
-                         (now.isoformat(), int(target_id), int(group_id)))
+        if win_rate is not None:
+            final_reply.insert(0, f"赛前预测：「{challenger_pet['pet_name']}」的胜率约为 {win_rate:.0%}。")
+        settlement = f"对决结算：胜利者获得了 {winner_exp} 点经验值和 ${money_gain}，参与者获得了 {loser_exp} 点经验值。"
+        final_reply.append(f"\n{settlement}")
+
+        with self.plugin.pet_system._connect() as conn:
+            # 为双方都设置冷却时间，以读取到的冷却时间为条件占用本轮对决
+            for pet_owner, pet in ((user_id, challenger_pet), (target_id, target_pet)):
+                cursor = conn.execute(
+                    "UPDATE pets SET last_duel_time = ?, version = version + 1 "
+                    "WHERE user_id = ? AND group_id = ? AND last_duel_time = ?",
+                    (now.isoformat(), int(pet_owner), int(group_id), pet['last_duel_time']))
+                if cursor.rowcount != 1:
+                    raise VersionConflict("对决双方的冷却时间已被修改")
 
             # 为胜利者增加金钱
-            conn.execute("UPDATE pets SET money = money + ? WHERE user_id = ? AND group_id = ?",
+            conn.execute("UPDATE pets SET money = money + ?, version = version + 1 WHERE user_id = ? AND group_id = ?",
                          (money_gain, int(winner_id), int(group_id)))
 
             # 发放经验
-            conn.execute("UPDATE pets SET exp = exp + ? WHERE user_id = ? AND group_id = ?",
+            conn.execute("UPDATE pets SET exp = exp + ?, version = version + 1 WHERE user_id = ? AND group_id = ?",
                          (winner_exp, int(winner_id), int(group_id)))
-            conn.execute("UPDATE pets SET exp = exp + ? WHERE user_id = ? AND group_id = ?",
+            conn.execute("UPDATE pets SET exp = exp + ?, version = version + 1 WHERE user_id = ? AND group_id = ?",
                          (loser_exp, int(loser_id), int(group_id)))
             conn.commit()
 
-        final_reply.extend(self.plugin.pet_system._check_level_up(winner_id, group_id))
-        final_reply.extend(self.plugin.pet_system._check_level_up(loser_id, group_id))
+        self.plugin.economy_ledger.record(winner_id, group_id, "duel_win", money_delta=money_gain, exp_delta=winner_exp)
+        self.plugin.economy_ledger.record(loser_id, group_id, "duel_loss", exp_delta=loser_exp)
+
+        level_up_messages = await self.plugin.pet_system._check_level_up(winner_id, group_id)
+        level_up_messages.extend(await self.plugin.pet_system._check_level_up(loser_id, group_id))
+        final_reply.extend(level_up_messages)
+
+        # 双方刚进入冷却，更新冷却表并从候选缓存中移除
+        self.plugin.cooldown_tracker.mark("duel", user_id, group_id, now)
+        self.plugin.cooldown_tracker.mark("duel", target_id, group_id, now)
+        self.plugin.pet_system._after_commit(lambda: self._discard_duel_candidates(group_id, user_id, target_id))
+        return final_reply, winner_name, [settlement] + level_up_messages
+
+    def _get_duel_candidates(self, group_id: str, level: int) -> set[str]:
+        """
+        获取同群内等级相近且对决冷却已结束的宠物主人。
+        查询由 (group_id, level, last_duel_time) 索引支撑，结果按等级区间短暂缓存。
+        """
+        low, high = max(1, level - RANDOM_DUEL_LEVEL_BAND), level + RANDOM_DUEL_LEVEL_BAND
+        key = (int(group_id), low, high)
+        now = time.monotonic()
+        cached = self._duel_candidates.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        # 未命中时顺带清理已过期的等级区间，缓存只保留最近 TTL 内用到的条目
+        for expired in [k for k, (expires_at, _) in self._duel_candidates.items() if expires_at <= now]:
+            del self._duel_candidates[expired]
+
+        ready_before = (datetime.now() - DUEL_COOLDOWN).isoformat()
+        with self.plugin.pet_system._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT user_id FROM pets WHERE group_id = ? AND level BETWEEN ? AND ? AND last_duel_time <= ?",
+                (int(group_id), low, high, ready_before))
+            candidates = {str(row[0]) for row in cursor.fetchall()}
+
+        self._duel_candidates[key] = (now + RANDOM_DUEL_CACHE_TTL, candidates)
+        return candidates
+
+    def _discard_duel_candidates(self, group_id: str, *user_ids: str):
+        """对决结束后把参与者从该群的所有候选缓存中移除。"""
+        for (cached_group, _, _), (_, candidates) in self._duel_candidates.items():
+            if cached_group == int(group_id):
+                candidates.difference_update(user_ids)
+
+    async def random_duel(self, event: AstrMessageEvent):
+        """在同群等级相近、冷却已结束的玩家中随机匹配一位对手进行对决"""
+        user_id, group_id = event.get_sender_id(), event.get_group_id()
+        if not group_id:
+            yield event.plain_result("该功能仅限群聊使用哦。")
+            return
+
+        tracker = self.plugin.cooldown_tracker
+        if not tracker.is_ready("duel", user_id, group_id):
+            remaining = tracker.remaining("duel", user_id, group_id)
+            yield event.plain_result(f"你的对决技能正在冷却中，还需等待 {str(remaining).split('.')[0]}。")
+            return
+
+        challenger_pet = await self.plugin.pet_system._get_pet(user_id, group_id)
+        if not challenger_pet:
+            yield event.plain_result("你还没有宠物，无法发起对决。")
+            return
+
+        now = datetime.now()
+        last_duel_challenger = datetime.fromisoformat(challenger_pet['last_duel_time'])
+        if now - last_duel_challenger < DUEL_COOLDOWN:
+            remaining = DUEL_COOLDOWN - (now - last_duel_challenger)
+            yield event.plain_result(f"你的对决技能正在冷却中，还需等待 {str(remaining).split('.')[0]}。")
+            return
+
+        candidates = list(self._get_duel_candidates(group_id, challenger_pet['level']) - {user_id})
+        random.shuffle(candidates)
+
+        # 抽取少量候选，优先选择胜率最接近五五开的对手
+        target_id, target_pet, best_gap = None, None, None
+        sampled = 0
+        for candidate_id in candidates:
+            if not tracker.is_ready("duel", candidate_id, group_id):
+                self._discard_duel_candidates(group_id, candidate_id)
+                continue
+            pet = await self.plugin.pet_system._get_pet(candidate_id, group_id, restore_archived=False)
+            if not pet or now - datetime.fromisoformat(pet['last_duel_time']) < DUEL_COOLDOWN:
+                self._discard_duel_candidates(group_id, candidate_id)
+                continue
+            sampled += 1
+            win_rate = predict_win_rate(challenger_pet, pet)
+            gap = abs(win_rate - 0.5) if win_rate is not None else 0
+            if best_gap is None or gap < best_gap:
+                target_id, target_pet, best_gap = candidate_id, pet, gap
+            if win_rate is None or sampled >= RANDOM_DUEL_SAMPLE_SIZE:
+                break
+
+        if not target_pet:
+            yield event.plain_result("群里暂时没有等级相近、可以接受对决的对手，稍后再来试试吧。")
+            return
+
+        duel_reply, winner_name, summary = await self._settle_duel(user_id, target_id, group_id, challenger_pet,
+                                                             target_pet, now)
+        final_reply = [f"匹配成功！你的对手是「{target_pet['pet_name']}」(Lv.{target_pet['level']})。"]
+        final_reply.extend(duel_reply)
+        yield event.plain_result("\n".join(final_reply))
 
-        yield event.plain_result("\n".join(final_reply))
\ No newline at end of file
+        card = await self.plugin.render_service.render_battle_card(group_id, user_id, challenger_pet, target_pet,
+                                                                    winner_name, summary)
+        if isinstance(card, Path):
+            yield event.image_result(str(card))
@@ -0,0 +1,209 @@
+import asyncio
+import heapq
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+try:
+    from astrbot.api import logger
+    from astrbot.api.event import MessageChain
+    from astrbot.core.message.components import At, Plain
+except ImportError:
+    # 脱离 AstrBot 运行时无法发送提醒，发送时按失败处理并记录日志
+    MessageChain = At = Plain = None
+
+    class DummyLogger:
+        def error(self, msg):
+            print(f"[ERROR] {msg}")
+    logger = DummyLogger()
+
+# --- 冷却参数 ---
+COOLDOWNS = {
+    "walk": timedelta(minutes=5),
+    "duel": timedelta(minutes=30),
+}
+COOLDOWN_NAMES = {"walk": "散步", "duel": "对决"}
+PRUNE_EVERY_MARKS = 1000  # 每记录若干次冷却就整体清理一次已到期的条目
+
+class CooldownTracker:
+    """
+    内存中的冷却追踪服务。
+    启动时从数据库重建，之后由各指令在写入冷却时间时同步更新，
+    "是否已冷却完毕"的判断只需一次字典查找，不再读取 SQLite。
+    订阅了提醒的玩家由一个按到期时间排序的小顶堆统一调度，冷却结束时向群里发送通知。
+    """
+    def __init__(self, plugin):
+        self.plugin = plugin
+        self.db_path = plugin.db_path
+        # kind -> {(user_id, group_id): 冷却结束的时间戳}，到期的条目在查询、提醒发出或定期清理时删除
+        self._ready_at: dict[str, dict[tuple[str, str], float]] = {kind: {} for kind in COOLDOWNS}
+        # 订阅了冷却提醒的玩家: (user_id, group_id) -> unified_msg_origin
+        self._subscribers: dict[tuple[str, str], str] = {}
+        self._heap: list[tuple[float, str, str, str]] = []
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._marks = 0
+
+    def load(self):
+        """从数据库重建所有仍在冷却中的条目与冷却提醒的订阅。"""
+        now = time.time()
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS cooldown_reminders (
+                    user_id INTEGER NOT NULL,
+                    group_id INTEGER NOT NULL,
+                    origin TEXT NOT NULL,
+                    PRIMARY KEY (user_id, group_id)
+                )
+            """)
+            conn.commit()
+            for user_id, group_id, origin in cursor.execute("SELECT user_id, group_id, origin FROM cooldown_reminders"):
+                self._subscribers[(str(user_id), str(group_id))] = origin
+
+            cursor.execute("SELECT user_id, group_id, last_walk_time, last_duel_time FROM pets")
+            for user_id, group_id, last_walk_time, last_duel_time in cursor.fetchall():
+                key = (str(user_id), str(group_id))
+                for kind, last_time in (("walk", last_walk_time), ("duel", last_duel_time)):
+                    if not last_time:
+                        continue
+                    ready_at = (datetime.fromisoformat(last_time) + COOLDOWNS[kind]).timestamp()
+                    if ready_at > now:
+                        self._ready_at[kind][key] = ready_at
+                        if key in self._subscribers:
+                            heapq.heappush(self._heap, (ready_at, kind, key[0], key[1]))
+        self.ensure_started()
+
+    def _pending(self, kind: str, key: tuple[str, str]) -> float | None:
+        """返回仍在冷却中的条目的结束时间，已到期的条目顺带删除。"""
+        ready_at = self._ready_at[kind].get(key)
+        if ready_at is not None and ready_at <= time.time():
+            # 订阅了提醒的条目留给调度堆弹出时删除，以免漏发提醒
+            if key not in self._subscribers:
+                del self._ready_at[kind][key]
+            return None
+        return ready_at
+
+    def is_ready(self, kind: str, user_id: str, group_id: str) -> bool:
+        """判断指定玩家的某项冷却是否已结束。"""
+        return self._pending(kind, (str(user_id), str(group_id))) is None
+
+    def remaining(self, kind: str, user_id: str, group_id: str) -> timedelta:
+        """返回剩余冷却时间，已结束时为 0。"""
+        ready_at = self._pending(kind, (str(user_id), str(group_id)))
+        return timedelta(seconds=max(0.0, ready_at - time.time())) if ready_at else timedelta(0)
+
+    def mark(self, kind: str, user_id: str, group_id: str, when: datetime):
+        """记录一次冷却的开始时间，订阅了提醒的玩家会被加入调度堆；对应的写入提交后才生效。"""
+        key = (str(user_id), str(group_id))
+        ready_at = (when + COOLDOWNS[kind]).timestamp()
+        self.plugin.pet_system._after_commit(lambda: self._mark(kind, key, ready_at))
+
+    def _mark(self, kind: str, key: tuple[str, str], ready_at: float):
+        self._ready_at[kind][key] = ready_at
+        if key in self._subscribers:
+            self._schedule(ready_at, kind, key)
+        self._marks += 1
+        if self._marks % PRUNE_EVERY_MARKS == 0:
+            self._prune()
+
+    def _prune(self):
+        """删除所有已到期且无人订阅提醒的条目，防止不再回来的玩家一直占用内存。"""
+        now = time.time()
+        for entries in self._ready_at.values():
+            for key in [key for key, ready_at in entries.items() if ready_at <= now and key not in self._subscribers]:
+                del entries[key]
+
+    def _schedule(self, ready_at: float, kind: str, key: tuple[str, str]):
+        heapq.heappush(self._heap, (ready_at, kind, key[0], key[1]))
+        self.ensure_started()
+        if self._wakeup:
+            self._wakeup.set()
+
+    def ensure_started(self):
+        """有待发送的提醒且处于事件循环中时启动提醒任务，启动时恢复的提醒也由此开始调度。"""
+        if not self._heap:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._notify_loop())
+
+    async def _notify_loop(self):
+        """按堆顶的到期时间休眠，到期后批量发送提醒。"""
+        while True:
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            ready_at, kind, user_id, group_id = heapq.heappop(self._heap)
+            key = (user_id, group_id)
+            # 冷却期间被重新记录过的条目已经过期，跳过
+            if self._ready_at[kind].get(key) != ready_at:
+                continue
+            del self._ready_at[kind][key]
+            origin = self._subscribers.get(key)
+            if origin:
+                await self._send_notification(origin, kind, user_id)
+
+    async def _send_notification(self, origin: str, kind: str, user_id: str):
+        # 任何失败都只影响这一条提醒，不能让提醒任务退出
+        try:
+            chain = MessageChain([At(qq=user_id), Plain(f" 你的宠物{COOLDOWN_NAMES[kind]}冷却结束啦，快去 /{COOLDOWN_NAMES[kind]} 吧！")])
+            await self.plugin.context.send_message(origin, chain)
+        except Exception as e:
+            logger.error(f"发送冷却提醒时发生错误: {e}")
+
+    async def toggle_reminder(self, event: object, action: str = "开启"):
+        """开启或关闭冷却结束提醒"""
+        user_id, group_id = event.get_sender_id(), event.get_group_id()
+        if not group_id:
+            yield event.plain_result("该功能仅限群聊使用哦。")
+            return
+
+        if action not in ("开启", "关闭"):
+            yield event.plain_result("用法: /冷却提醒 [开启|关闭]")
+            return
+
+        key = (str(user_id), str(group_id))
+        if action == "关闭":
+            with self.plugin.pet_system._connect() as conn:
+                conn.execute("DELETE FROM cooldown_reminders WHERE user_id = ? AND group_id = ?",
+                             (int(user_id), int(group_id)))
+                conn.commit()
+            self.plugin.pet_system._after_commit(lambda: self._subscribers.pop(key, None))
+            yield event.plain_result("已关闭冷却提醒。")
+            return
+
+        origin = event.unified_msg_origin
+        with self.plugin.pet_system._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO cooldown_reminders (user_id, group_id, origin) VALUES (?, ?, ?)",
+                         (int(user_id), int(group_id), origin))
+            conn.commit()
+        self.plugin.pet_system._after_commit(lambda: self._subscribe(key, origin))
+        yield event.plain_result("已开启冷却提醒，散步或对决冷却结束时会在群里提醒你。")
+
+    def _subscribe(self, key: tuple[str, str], origin: str):
+        self._subscribers[key] = origin
+        # 已经在冷却中的项目也加入调度
+        for kind in COOLDOWNS:
+            ready_at = self._ready_at[kind].get(key)
+            if ready_at:
+                self._schedule(ready_at, kind, key)
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,277 @@
+import asyncio
+import contextvars
+import sqlite3
+import threading
+
+try:
+    from astrbot.api import logger
+except ImportError:
+    class DummyLogger:
+        def error(self, msg):
+            print(f"[ERROR] {msg}")
+    logger = DummyLogger()
+
+class TickCommitFailed(Exception):
+    """指令所在 tick 的批量提交失败，指令的写入与副作用均已撤销。"""
+
+class _Command:
+    """actor 中正在执行的一条指令：写入加入过的全部 tick，以及是否已让出所在群的队列。"""
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.ticks: list[asyncio.Future] = []
+        self.released = loop.create_future()
+
+# 当前协程所属的指令，由 GroupActor 在执行指令的任务中设置
+_current_command: contextvars.ContextVar[_Command | None] = contextvars.ContextVar("_current_command", default=None)
+
+class TickConnection:
+    """
+    tick 内共享连接的包装，接口与 sqlite3.Connection 的常用部分一致。
+    每个 with 代码块对应一个 SAVEPOINT，出错时只回滚该代码块；真正的提交由 TickBatcher 在 tick 结束时统一进行。
+    """
+    def __init__(self, batcher: "TickBatcher"):
+        self._batcher = batcher
+        self._savepoints: list[str] = []
+        self.row_factory = None
+
+    def cursor(self) -> sqlite3.Cursor:
+        cursor = self._batcher.conn.cursor()
+        cursor.row_factory = self.row_factory
+        return cursor
+
+    def execute(self, sql: str, parameters=()) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters) -> sqlite3.Cursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        # 由 tick 统一提交
+        pass
+
+    def __enter__(self):
+        name = self._batcher.begin()
+        self._savepoints.append(name)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        name = self._savepoints.pop()
+        conn = self._batcher.conn
+        if exc_type is not None:
+            conn.execute(f"ROLLBACK TO {name}")
+        conn.execute(f"RELEASE {name}")
+        return False
+
+class TickBatcher:
+    """
+    把同一个短周期(tick)内所有指令的写入合并到一个事务中提交。
+    只服务于创建它的事件循环所在线程，其他线程仍使用独立连接。
+    """
+    def __init__(self, db_path, tick_interval: float, setup=None):
+        self.db_path = db_path
+        self.tick_interval = tick_interval
+        # 连接建立后、开启任何事务之前执行的初始化，例如挂载归档库
+        self._setup = setup
+        self.conn: sqlite3.Connection | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread_id: int | None = None
+        self._tick: asyncio.Future | None = None
+        # 本 tick 内登记的 (提交后执行, 回滚后执行) 回调
+        self._callbacks: list[tuple] = []
+        self._savepoint_seq = 0
+        self.commits = 0
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        if self._loop is None:
+            self._loop = loop
+            self._thread_id = threading.get_ident()
+            self.conn = sqlite3.connect(self.db_path, isolation_level=None)
+            if self._setup:
+                self._setup(self.conn)
+
+    def connection(self) -> TickConnection | None:
+        """在绑定的线程中返回共享连接的包装，否则返回 None。"""
+        if self.conn is None or threading.get_ident() != self._thread_id:
+            return None
+        return TickConnection(self)
+
+    def begin(self) -> str:
+        """开启一个新的 SAVEPOINT，必要时开启本 tick 的事务并安排提交。"""
+        if self._tick is None:
+            self.conn.execute("BEGIN")
+            self._tick = self._loop.create_future()
+            self._loop.call_later(self.tick_interval, self._commit)
+        # 指令在多个 tick 中写入时（例如写入后等待渲染再写入），需要等所有这些 tick 都提交
+        command = _current_command.get()
+        if command is not None and self._tick not in command.ticks:
+            command.ticks.append(self._tick)
+        self._savepoint_seq += 1
+        name = f"sp_{self._savepoint_seq}"
+        self.conn.execute(f"SAVEPOINT {name}")
+        return name
+
+    def current_tick(self) -> asyncio.Future | None:
+        return self._tick
+
+    def after_commit(self, callback=None, on_rollback=None) -> bool:
+        """
+        在当前线程有未提交的 tick 时登记回调并返回 True，否则返回 False，由调用方立即执行。
+        内存中的副作用（账本缓冲、冷却表、候选缓存）应在写入真正提交后再生效。
+        """
+        if self._tick is None or threading.get_ident() != self._thread_id:
+            return False
+        self._callbacks.append((callback, on_rollback))
+        return True
+
+    def _commit(self):
+        tick, self._tick = self._tick, None
+        callbacks, self._callbacks = self._callbacks, []
+        try:
+            self.conn.execute("COMMIT")
+        except Exception as e:
+            logger.error(f"批量提交失败，本 tick 的写入已回滚: {e}")
+            try:
+                self.conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                # IOERR、FULL 等错误后 SQLite 已自动回滚，事务不再存在
+                pass
+            self._run_callbacks(callback for _, callback in callbacks)
+            tick.set_exception(TickCommitFailed(str(e)))
+            return
+        self.commits += 1
+        self._run_callbacks(callback for callback, _ in callbacks)
+        tick.set_result(None)
+
+    @staticmethod
+    def _run_callbacks(callbacks):
+        for callback in callbacks:
+            if callback is None:
+                continue
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"执行提交回调时发生错误: {e}")
+
+    def flush(self):
+        """立即提交尚未结束的 tick。"""
+        if self._tick is not None:
+            self._commit()
+
+class GroupActor:
+    """
+    按顺序执行某个群的指令，空闲一段时间后自动退出。
+    每条指令在独立的任务中执行；指令开始渲染、重试退避等长时间等待前调用 release，
+    actor 随即处理下一条指令，被让出的指令在后台继续完成。
+    """
+    def __init__(self, manager: "GroupActorManager", group_id: str):
+        self.manager = manager
+        self.group_id = group_id
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                agen, future = await asyncio.wait_for(self.queue.get(), timeout=self.manager.idle_timeout)
+            except asyncio.TimeoutError:
+                if self.queue.empty():
+                    self.manager._actors.pop(self.group_id, None)
+                    return
+                continue
+
+            command = _Command(asyncio.get_running_loop())
+            task = asyncio.get_running_loop().create_task(self._execute(agen, future, command))
+            self.manager._commands.add(task)
+            task.add_done_callback(self.manager._commands.discard)
+            await asyncio.wait({task, command.released}, return_when=asyncio.FIRST_COMPLETED)
+
+    @staticmethod
+    async def _execute(agen, future: asyncio.Future, command: _Command):
+        _current_command.set(command)
+        try:
+            results = [result async for result in agen]
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result((results, command.ticks))
+
+class GroupActorManager:
+    """
+    可选的按群执行模式。
+    每个活跃的群拥有一个顺序处理指令的 actor，所有写入按 tick 合并提交，
+    指令结果在所在 tick 提交后才返回，额外延迟不超过一个 tick。
+    actor 只串行执行指令的数据库部分，渲染与重试退避前指令会让出队列，不阻塞同群的后续指令。
+
+    tick 事务在整个周期内持有写锁，因此事件循环线程上运行期间的所有数据库访问都必须经过
+    PetSystem._connect()；另开连接写入会一直等到 "database is locked" 超时。
+    提交失败时整个 tick 回滚，通过 after_commit 登记的副作用被丢弃，
+    相关指令不会重试，而是收到 TickCommitFailed，由调用方提示玩家重新操作。
+    """
+    def __init__(self, plugin, enabled: bool = False, tick_ms: int = 50, idle_timeout: float = 300.0):
+        self.plugin = plugin
+        self.enabled = enabled
+        self.idle_timeout = idle_timeout
+        self.batcher = TickBatcher(plugin.db_path, tick_ms / 1000, setup=self._setup_connection)
+        self._actors: dict[str, GroupActor] = {}
+        # 已让出队列、仍在后台执行的指令任务
+        self._commands: set[asyncio.Task] = set()
+        self.commands = 0
+
+    def _setup_connection(self, conn: sqlite3.Connection):
+        # tick 连接始终处于事务中，归档库需要在建立连接时提前挂载
+        archiver = getattr(self.plugin, "pet_archiver", None)
+        if archiver:
+            archiver.attach(conn)
+
+    def after_commit(self, callback=None, on_rollback=None):
+        """写入提交后执行 callback；不在 tick 中时立即执行。tick 回滚时改为执行 on_rollback。"""
+        if not (self.enabled and self.batcher.after_commit(callback, on_rollback)) and callback:
+            callback()
+
+    def release(self):
+        """当前指令即将长时间等待（渲染、重试退避），让所在群的 actor 先处理后续指令。不在 actor 中时什么也不做。"""
+        command = _current_command.get()
+        if command is not None and not command.released.done():
+            command.released.set_result(None)
+
+    def connection(self) -> TickConnection | None:
+        """开启按群执行模式时，返回当前线程可用的 tick 共享连接。"""
+        if not self.enabled:
+            return None
+        return self.batcher.connection()
+
+    async def dispatch(self, group_id: str | None, agen):
+        """把指令交给所在群的 actor 执行，并在写入提交后依次返回结果。"""
+        if not self.enabled or not group_id:
+            async for result in agen:
+                yield result
+            return
+
+        loop = asyncio.get_running_loop()
+        self.batcher.bind(loop)
+        actor = self._actors.get(group_id)
+        if actor is None:
+            actor = self._actors[group_id] = GroupActor(self, group_id)
+
+        future = loop.create_future()
+        actor.queue.put_nowait((agen, future))
+        self.commands += 1
+        results, ticks = await future
+        # 指令写入过的每个 tick 都提交成功后才返回结果，任一 tick 回滚都会抛出 TickCommitFailed
+        for tick in ticks:
+            await asyncio.shield(tick)
+        for result in results:
+            yield result
+
+    async def stop(self):
+        for actor in list(self._actors.values()):
+            actor.task.cancel()
+        self._actors.clear()
+        for task in list(self._commands):
+            task.cancel()
+        self.batcher.flush()
+        if self.batcher.conn is not None:
+            self.batcher.conn.close()
+            self.batcher.conn = None
@@ -4,6 +4,7 @@ import io
 import json
 import re
 from datetime import datetime, timedelta
+from collections import OrderedDict
 from pathlib import Path
 from PIL import Image, ImageDraw, ImageFont
 # 由于无法解析 "astrbot.api" 导入，推测使用相对导入
@@ -23,44 +24,348 @@ except ImportError:
 # 引入宠物类型数据
 from .pet_system import PET_TYPES
 
+# --- 卡片布局参数 ---
+CARD_SIZE = (800, 600)
+SPRITE_SIZE = (200, 200)
+STATUS_CARD_CACHE_SIZE = 32  # 每个进程缓存的状态卡编码数量
+
+# 群宠物总览: 每页 OVERVIEW_COLUMNS 列，每格一张缩略图加三行文字
+OVERVIEW_COLUMNS = 4
+OVERVIEW_CELL = (200, 160)
+OVERVIEW_HEADER = 70
+THUMB_SIZE = (80, 80)
+
+# 跨群宠物卡片: 每只宠物一行
+PROFILE_WIDTH = 800
+PROFILE_ROW_HEIGHT = 100
+PROFILE_HEADER = 80
+PROFILE_MAX_ROWS = 10  # 最多展示的宠物数量
+
+# 各种族立绘文件名前缀
+PET_IMAGE_PREFIXES = {
+    "碧波兽": "WaterSprite",
+    "烈焰": "FirePup",
+    "莲莲草": "LeafyCat",
+    "碎裂岩": "cataclastic_rock",
+    "金刚": "King_Kong",
+}
+
+def get_pet_image_filename(pet_type: str, evolution_stage: int) -> str:
+    """根据宠物类型和进化阶段返回对应的图片文件名"""
+    # 动态生成宠物类型到图片文件名的映射
+    pet_image_mapping = {}
+    for pet_type_name, pet_info in PET_TYPES.items():
+        evolutions = pet_info.get('evolutions', {})
+        for stage, evo_info in evolutions.items():
+            evo_name = evo_info.get('name', pet_type_name)
+            # 根据宠物类型和进化阶段生成图片文件名，默认使用宠物类型名称作为图片文件名
+            prefix = PET_IMAGE_PREFIXES.get(pet_type_name, evo_name)
+            pet_image_mapping[evo_name] = f"{prefix}_{stage}.png"
+
+    # 获取进化信息
+    pet_type_info = PET_TYPES.get(pet_type, {})
+    evolutions = pet_type_info.get('evolutions', {})
+    evo_info = evolutions.get(evolution_stage, {})
+    evo_name = evo_info.get('name', pet_type)  # 如果没有找到进化名称，则使用宠物类型名称
+
+    # 返回对应的图片文件名，如果找不到则返回默认图片
+    return pet_image_mapping.get(evo_name, "background.png")
+
+def _ensure_default_assets(assets_dir: Path) -> Path | None:
+    """创建默认素材目录、背景和字体文件（如果不存在），返回可用的字体路径。"""
+    if not assets_dir.exists():
+        assets_dir.mkdir(parents=True, exist_ok=True)
+
+    bg_path = assets_dir / "background.png"
+    font_path = assets_dir / "font.ttf"
+
+    # 如果素材文件不存在，创建简单的默认文件
+    if not bg_path.exists():
+        # 创建默认背景
+        bg_img = Image.new('RGB', CARD_SIZE, color=(70, 130, 180))
+        bg_img.save(bg_path, format='PNG')
+
+    if not font_path.exists():
+        # 创建默认字体文件（如果不存在）
+        try:
+            # 创建一个简单的默认字体文件
+            font_img = Image.new('RGB', (100, 100), color=(255, 255, 255))
+            font_draw = ImageDraw.Draw(font_img)
+            font_draw.text((10, 10), "A", fill=(0, 0, 0))
+            font_img.save(font_path, format='PNG')
+        except Exception as e:
+            logger.error(f"创建默认字体文件时发生错误: {e}")
+            return None
+    return font_path
+
+class CardAssets:
+    """
+    卡片绘制所需的素材缓存。
+    背景、字体和宠物立绘各只加载一次，之后每张卡片直接复用。
+    """
+    def __init__(self, assets_dir: Path):
+        self.assets_dir = assets_dir
+        self.font_path = _ensure_default_assets(assets_dir)
+        self._backgrounds: dict[tuple[int, int], Image.Image] = {}
+        self._fonts: dict[int, ImageFont.ImageFont] = {}
+        self._sprites: dict[tuple[str, int, tuple[int, int]], Image.Image | None] = {}
+        self._status_templates: dict[tuple[str, int], Image.Image] = {}
+        # 最近生成的状态卡编码，按动态字段组成的键做 LRU 缓存
+        self._status_cards: OrderedDict[tuple, bytes] = OrderedDict()
+
+    def background(self, size: tuple[int, int] = CARD_SIZE) -> Image.Image:
+        """返回一张指定尺寸、可直接绘制的背景副本。"""
+        if size not in self._backgrounds:
+            self._backgrounds[size] = Image.open(self.assets_dir / "background.png").resize(size)
+        return self._backgrounds[size].copy()
+
+    def font(self, size: int) -> ImageFont.ImageFont:
+        """尝试使用指定字体，如果失败则使用默认字体。"""
+        if size not in self._fonts:
+            try:
+                if self.font_path and self.font_path.exists():
+                    self._fonts[size] = ImageFont.truetype(str(self.font_path), size)
+                else:
+                    self._fonts[size] = ImageFont.load_default()
+            except Exception:
+                self._fonts[size] = ImageFont.load_default()
+        return self._fonts[size]
+
+    def sprite(self, pet_type: str, evolution_stage: int, size: tuple[int, int] = SPRITE_SIZE) -> Image.Image | None:
+        """加载宠物立绘并缩放到指定尺寸，找不到图片时返回 None。"""
+        key = (pet_type, evolution_stage, size)
+        if key not in self._sprites:
+            pet_image_path = self.assets_dir / get_pet_image_filename(pet_type, evolution_stage)
+            self._sprites[key] = Image.open(pet_image_path).resize(size) if pet_image_path.exists() else None
+        return self._sprites[key]
+
+    def status_template(self, pet_type: str, evolution_stage: int) -> Image.Image:
+        """返回一张 (种族, 进化阶段) 对应的状态卡模板副本。"""
+        key = (pet_type, evolution_stage)
+        if key not in self._status_templates:
+            self._status_templates[key] = _render_status_template(self, pet_type, evolution_stage)
+        return self._status_templates[key].copy()
+
+    def cached_status(self, key: tuple) -> bytes | None:
+        encoded = self._status_cards.get(key)
+        if encoded is not None:
+            self._status_cards.move_to_end(key)
+        return encoded
+
+    def cache_status(self, key: tuple, encoded: bytes):
+        self._status_cards[key] = encoded
+        self._status_cards.move_to_end(key)
+        while len(self._status_cards) > STATUS_CARD_CACHE_SIZE:
+            self._status_cards.popitem(last=False)
+
+    def warm_up(self):
+        """预加载背景、常用字号和全部宠物立绘。"""
+        self.background()
+        for size in (18, 24, 28, 40, 64):
+            self.font(size)
+        for pet_type, pet_info in PET_TYPES.items():
+            for stage in pet_info['evolutions']:
+                self.sprite(pet_type, stage)
+                self.sprite(pet_type, stage, THUMB_SIZE)
+                self.status_template(pet_type, stage)
+
+# 状态卡中的静态标签: (位置, 标签, 颜色)，数值部分紧跟在标签之后绘制
+STATUS_LABELS = {
+    "owner": ((400, 150), "主人: ", "white"),
+    "level": ((400, 250), "等级: ", "white"),
+    "exp": ((400, 300), "经验: ", "white"),
+    "attack": ((400, 390), "攻击: ", "white"),
+    "defense": ((600, 390), "防御: ", "white"),
+    "mood": ((400, 440), "心情: ", "white"),
+    "satiety": ((600, 440), "饱食度: ", "white"),
+    "money": ((400, 490), "金钱: ", "#FFD700"),
+}
+EXP_BAR = (400, 340, 750, 360)
+
+def _render_status_template(assets: CardAssets, pet_type: str, evolution_stage: int) -> Image.Image:
+    """绘制状态卡中与具体数值无关的部分：背景、立绘、种族、标签和经验条边框。"""
+    img = assets.background()
+    draw = ImageDraw.Draw(img)
+    font_text = assets.font(28)
+
+    evo_info = PET_TYPES[pet_type]['evolutions'][evolution_stage]
+
+    # 加载宠物图片
+    pet_img = assets.sprite(pet_type, evolution_stage)
+    if pet_img:
+        img.paste(pet_img, (100, 150))
+
+    draw.text((400, 200), f"种族: {evo_info['name']} ({pet_type})", font=font_text, fill="white")
+    for position, label, color in STATUS_LABELS.values():
+        draw.text(position, label, font=font_text, fill=color)
+    draw.rectangle(list(EXP_BAR), outline="white", fill="gray")
+    return img
+
+def render_status_card(assets: CardAssets, pet_data: dict, sender_name: str, exp_for_level: int,
+                       output_path: Path) -> Path:
+    """
+    绘制宠物状态卡并保存到 output_path。
+    静态部分按 (种族, 进化阶段) 缓存为模板，每次只绘制变化的数值；
+    数值完全相同时直接复用上次编码好的 PNG。
+    """
+    values = {
+        "owner": sender_name,
+        "level": f"Lv.{pet_data['level']}",
+        "exp": f"{pet_data['exp']} / {exp_for_level}",
+        "attack": pet_data['attack'],
+        "defense": pet_data['defense'],
+        "mood": f"{pet_data['mood']}/100",
+        "satiety": f"{pet_data['satiety']}/100",
+        "money": f"${pet_data.get('money', 0)}",
+    }
+    key = (pet_data['pet_type'], pet_data['evolution_stage'], pet_data['pet_name'],
+           *(str(value) for value in values.values()))
+    encoded = assets.cached_status(key)
+    if encoded is None:
+        W, H = CARD_SIZE
+        img = assets.status_template(pet_data['pet_type'], pet_data['evolution_stage'])
+        draw = ImageDraw.Draw(img)
+        font_title = assets.font(40)
+        font_text = assets.font(28)
+
+        # 绘制宠物信息
+        draw.text((W / 2, 50), f"{pet_data['pet_name']}的状态", font=font_title, fill="white", anchor="mt")
+        for name, ((x, y), label, color) in STATUS_LABELS.items():
+            draw.text((x + draw.textlength(label, font=font_text), y), str(values[name]), font=font_text, fill=color)
+
+        # 经验条
+        exp_ratio = min(1.0, pet_data['exp'] / exp_for_level) if exp_for_level > 0 else 0
+        left, top, right, bottom = EXP_BAR
+        draw.rectangle([left, top, left + (right - left) * exp_ratio, bottom], fill="#66ccff")
+
+        buffer = io.BytesIO()
+        img.save(buffer, format='PNG')
+        encoded = buffer.getvalue()
+        assets.cache_status(key, encoded)
+
+    # 将图片保存到缓存文件夹
+    output_path.write_bytes(encoded)
+    return output_path
+
+def render_battle_card(assets: CardAssets, challenger_pet: dict, target_pet: dict, winner_name: str,
+                       summary: list[str], output_path: Path) -> Path:
+    """绘制对决结果卡：双方立绘、胜负标记与结算信息。"""
+    W, H = CARD_SIZE
+    img = assets.background()
+    draw = ImageDraw.Draw(img)
+    font_title = assets.font(40)
+    font_text = assets.font(28)
+    font_small = assets.font(24)
+
+    draw.text((W / 2, 40), "对决结果", font=font_title, fill="white", anchor="mt")
+    draw.text((W / 2, 250), "VS", font=assets.font(64), fill="#FFD700", anchor="mm")
+
+    for pet, x in ((challenger_pet, 100), (target_pet, 500)):
+        pet_img = assets.sprite(pet['pet_type'], pet.get('evolution_stage', 1))
+        if pet_img:
+            img.paste(pet_img, (x, 150))
+        center = x + SPRITE_SIZE[0] / 2
+        if pet['pet_name'] == winner_name:
+            draw.text((center, 110), "胜利!", font=font_text, fill="#FFD700", anchor="mt")
+        draw.text((center, 365), f"{pet['pet_name']}", font=font_text, fill="white", anchor="mt")
+        draw.text((center, 400), f"Lv.{pet['level']}", font=font_small, fill="white", anchor="mt")
+
+    # 结算信息
+    for i, line in enumerate(summary[:4]):
+        draw.text((W / 2, 450 + i * 34), line, font=font_small, fill="white", anchor="mt")
+
+    img.save(output_path, format='PNG')
+    return output_path
+
+def render_group_overview(assets: CardAssets, pets: list[dict], page: int, pages: int, total: int,
+                          output_path: Path) -> Path:
+    """把一页宠物拼成网格总览图：缓存的缩略图、名字、等级与主要属性。"""
+    rows = max(1, (len(pets) + OVERVIEW_COLUMNS - 1) // OVERVIEW_COLUMNS)
+    cell_w, cell_h = OVERVIEW_CELL
+    W, H = cell_w * OVERVIEW_COLUMNS, OVERVIEW_HEADER + cell_h * rows
+    img = assets.background((W, H))
+    draw = ImageDraw.Draw(img)
+    font_title = assets.font(40)
+    font_text = assets.font(24)
+    font_small = assets.font(18)
+
+    draw.text((W / 2, 15), f"本群宠物总览 ({page}/{pages} 页，共 {total} 只)", font=font_title, fill="white", anchor="mt")
+    for i, pet in enumerate(pets):
+        x = (i % OVERVIEW_COLUMNS) * cell_w
+        y = OVERVIEW_HEADER + (i // OVERVIEW_COLUMNS) * cell_h
+        center = x + cell_w / 2
+
+        thumb = assets.sprite(pet['pet_type'], pet['evolution_stage'], THUMB_SIZE)
+        if thumb:
+            img.paste(thumb, (int(center - THUMB_SIZE[0] / 2), y))
+        draw.text((center, y + 84), pet['pet_name'], font=font_text, fill="white", anchor="mt")
+        draw.text((center, y + 112), f"Lv.{pet['level']}  攻{pet['attack']} 防{pet['defense']}",
+                  font=font_small, fill="#FFD700", anchor="mt")
+        draw.text((center, y + 134), f"饱食{pet['satiety']} 心情{pet['mood']}", font=font_small, fill="white", anchor="mt")
+
+    # 总览图尺寸较大，低压缩级别能把编码耗时减少一半以上
+    img.save(output_path, format='PNG', compress_level=1)
+    return output_path
+
+def render_player_profile(assets: CardAssets, owner_name: str, pets: list[dict], output_path: Path,
+                          max_rows: int = PROFILE_MAX_ROWS) -> Path:
+    """把玩家在各个群中的宠物合成为一张卡片：缩略图、种族、等级、所在群与金钱。"""
+    shown = pets[:max_rows]
+    footer = 50 if len(pets) > len(shown) else 20
+    W, H = PROFILE_WIDTH, PROFILE_HEADER + PROFILE_ROW_HEIGHT * len(shown) + footer
+    img = assets.background((W, H))
+    draw = ImageDraw.Draw(img)
+    font_title = assets.font(40)
+    font_text = assets.font(28)
+    font_small = assets.font(24)
+
+    total_money = sum(pet['money'] for pet in pets)
+    draw.text((W / 2, 20), f"{owner_name}的所有宠物 (共 {len(pets)} 只，金钱 ${total_money})",
+              font=font_title, fill="white", anchor="mt")
+    for i, pet in enumerate(shown):
+        y = PROFILE_HEADER + i * PROFILE_ROW_HEIGHT
+        thumb = assets.sprite(pet['pet_type'], pet['evolution_stage'], THUMB_SIZE)
+        if thumb:
+            img.paste(thumb, (40, y + 10))
+        evo_name = PET_TYPES[pet['pet_type']]['evolutions'][pet['evolution_stage']]['name']
+        draw.text((140, y + 14), f"{pet['pet_name']} ({evo_name})  Lv.{pet['level']}", font=font_text, fill="white")
+        draw.text((140, y + 54), f"群 {pet['group_id']}", font=font_small, fill="white")
+        draw.text((500, y + 54), f"金钱: ${pet['money']}", font=font_small, fill="#FFD700")
+
+    if len(pets) > len(shown):
+        draw.text((W / 2, H - 40), f"另有 {len(pets) - len(shown)} 只宠物未显示", font=font_small, fill="white", anchor="mt")
+
+    img.save(output_path, format='PNG', compress_level=1)
+    return output_path
+
 class ImageGenerator:
     def __init__(self, plugin):
         self.plugin = plugin
         self.data_dir = plugin.data_dir
         self.assets_dir = plugin.assets_dir
         self.cache_dir = plugin.cache_dir
+        self._assets: CardAssets | None = None
+
+    def _get_assets(self) -> CardAssets:
+        if self._assets is None:
+            self._assets = CardAssets(self.assets_dir)
+        return self._assets
         
     def _get_pet_image_filename(self, pet_type: str, evolution_stage: int) -> str:
         """根据宠物类型和进化阶段返回对应的图片文件名"""
-        # 动态生成宠物类型到图片文件名的映射
-        pet_image_mapping = {}
-        for pet_type_name, pet_info in PET_TYPES.items():
-            evolutions = pet_info.get('evolutions', {})
-            for stage, evo_info in evolutions.items():
-                evo_name = evo_info.get('name', pet_type_name)
-                # 根据宠物类型和进化阶段生成图片文件名
-                if pet_type_name == "碧波兽":
-                    pet_image_mapping[evo_name] = f"WaterSprite_{stage}.png"
-                elif pet_type_name == "烈焰":
-                    pet_image_mapping[evo_name] = f"FirePup_{stage}.png"
-                elif pet_type_name == "莲莲草":
-                    pet_image_mapping[evo_name] = f"LeafyCat_{stage}.png"
-                elif pet_type_name == "碎裂岩":
-                    pet_image_mapping[evo_name] = f"cataclastic_rock_{stage}.png"
-                elif pet_type_name == "金刚":
-                    pet_image_mapping[evo_name] = f"King_Kong_{stage}.png"
-                else:
-                    # 默认使用宠物类型名称作为图片文件名
-                    pet_image_mapping[evo_name] = f"{evo_name}_{stage}.png"
-        
-        # 获取进化信息
-        pet_type_info = PET_TYPES.get(pet_type, {})
-        evolutions = pet_type_info.get('evolutions', {})
-        evo_info = evolutions.get(evolution_stage, {})
-        evo_name = evo_info.get('name', pet_type)  # 如果没有找到进化名称，则使用宠物类型名称
-        
-        # 返回对应的图片文件名，如果找不到则返回默认图片
-        return pet_image_mapping.get(evo_name, "background.png")
+        return get_pet_image_filename(pet_type, evolution_stage)
+
+    def _status_image_path(self, pet_data: dict) -> Path:
+        return self.cache_dir / f"status_{pet_data['group_id']}_{pet_data['user_id']}.png"
+
+    def _battle_image_path(self, group_id: str, user_id: str) -> Path:
+        return self.cache_dir / f"duel_{group_id}_{user_id}.png"
+
+    def _overview_image_path(self, group_id: str, page: int) -> Path:
+        return self.cache_dir / f"overview_{group_id}_{page}.png"
+
+    def _profile_image_path(self, user_id: str) -> Path:
+        return self.cache_dir / f"profile_{user_id}.png"
         
     def _generate_pet_status_image(self, pet_data: dict, sender_name: str) -> Path | str:
         """
@@ -68,87 +373,9 @@ class ImageGenerator:
         成功则返回文件路径(Path)，失败则返回错误信息字符串(str)。
         """
         try:
-            # 创建默认素材目录
-            assets_dir = self.assets_dir
-            if not assets_dir.exists():
-                assets_dir.mkdir(parents=True, exist_ok=True)
-                
-            # 创建默认背景和字体文件（如果不存在）
-            bg_path = assets_dir / "background.png"
-            font_path = assets_dir / "font.ttf"
-            
-            # 如果素材文件不存在，创建简单的默认文件
-            if not bg_path.exists():
-                # 创建默认背景
-                bg_img = Image.new('RGB', (800, 600), color=(70, 130, 180))
-                bg_img.save(bg_path, format='PNG')
-                
-            if not font_path.exists():
-                # 创建默认字体文件（如果不存在）
-                try:
-                    # 创建一个简单的默认字体文件
-                    from PIL import Image, ImageDraw, ImageFont
-                    font_img = Image.new('RGB', (100, 100), color=(255, 255, 255))
-                    font_draw = ImageDraw.Draw(font_img)
-                    font_draw.text((10, 10), "A", fill=(0, 0, 0))
-                    font_img.save(font_path, format='PNG')
-                except Exception as e:
-                    logger.error(f"创建默认字体文件时发生错误: {e}")
-                    font_path = None
-            
-            W, H = 800, 600
-            img = Image.open(bg_path).resize((W, H))
-            draw = ImageDraw.Draw(img)
-            
-            # 尝试使用指定字体，如果失败则使用默认字体
-            try:
-                if font_path and font_path.exists():
-                    font_title = ImageFont.truetype(str(font_path), 40)
-                    font_text = ImageFont.truetype(str(font_path), 28)
-                else:
-                    font_title = ImageFont.load_default()
-                    font_text = ImageFont.load_default()
-            except:
-                font_title = ImageFont.load_default()
-                font_text = ImageFont.load_default()
-
-            pet_type_info = PET_TYPES[pet_data['pet_type']]
-            evo_info = pet_type_info['evolutions'][pet_data['evolution_stage']]
-            
-            # 加载宠物图片
-            pet_image_filename = self._get_pet_image_filename(pet_data['pet_type'], pet_data['evolution_stage'])
-            pet_image_path = self.assets_dir / pet_image_filename
-            if pet_image_path.exists():
-                pet_img = Image.open(pet_image_path).resize((200, 200))
-                img.paste(pet_img, (100, 150))
-            
-            # 绘制宠物信息
-            draw.text((W / 2, 50), f"{pet_data['pet_name']}的状态", font=font_title, fill="white", anchor="mt")
-            draw.text((400, 150), f"主人: {sender_name}", font=font_text, fill="white")
-            draw.text((400, 200), f"种族: {evo_info['name']} ({pet_data['pet_type']})", font=font_text, fill="white")
-            draw.text((400, 250), f"等级: Lv.{pet_data['level']}", font=font_text, fill="white")
-
-            # 经验条
             exp_for_level = self.plugin.pet_system._exp_for_next_level(pet_data['level'])
-            exp_ratio = min(1.0, pet_data['exp'] / exp_for_level) if exp_for_level > 0 else 0
-            draw.text((400, 300), f"经验: {pet_data['exp']} / {exp_for_level}", font=font_text, fill="white")
-            draw.rectangle([400, 340, 750, 360], outline="white", fill="gray")
-            draw.rectangle([400, 340, 400 + 350 * exp_ratio, 360], fill="#66ccff")
-
-            # 属性值
-            draw.text((400, 390), f"攻击: {pet_data['attack']}", font=font_text, fill="white")
-            draw.text((600, 390), f"防御: {pet_data['defense']}", font=font_text, fill="white")
-            draw.text((400, 440), f"心情: {pet_data['mood']}/100", font=font_text, fill="white")
-            draw.text((600, 440), f"饱食度: {pet_data['satiety']}/100", font=font_text, fill="white")
-
-            # 金钱
-            draw.text((400, 490), f"金钱: ${pet_data.get('money', 0)}", font=font_text, fill="#FFD700")
-
-            # 将图片保存到缓存文件夹
-            output_path = self.cache_dir / f"status_{pet_data['group_id']}_{pet_data['user_id']}.png"
-            img.save(output_path, format='PNG')
-            return output_path
-
+            return render_status_card(self._get_assets(), pet_data, sender_name, exp_for_level,
+                                      self._status_image_path(pet_data))
         except Exception as e:
             logger.error(f"生成状态图时发生未知错误: {e}")
-            return f"生成状态图时发生未知错误: {e}"
\ No newline at end of file
+            return f"生成状态图时发生未知错误: {e}"
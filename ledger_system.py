@@ -0,0 +1,184 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+try:
+    from astrbot.api import logger
+except ImportError:
+    class DummyLogger:
+        def error(self, msg):
+            print(f"[ERROR] {msg}")
+    logger = DummyLogger()
+
+# --- 账本事件类型 ---
+LEDGER_EVENT_TYPES = {
+    "walk_reward": "散步奇遇",
+    "walk_battle": "散步战斗",
+    "duel_win": "对决胜利",
+    "duel_loss": "对决失败",
+    "purchase": "购买物品",
+    "feed": "投喂物品",
+}
+
+class EconomyLedger:
+    """
+    只追加的经济账本。
+    事件先缓存在内存中，达到批量大小或时间间隔后一次性批量写入，
+    并定期把新增流水汇总到按玩家划分的快照表中。
+    """
+    def __init__(self, plugin, batch_size: int = 200, flush_interval: float = 5.0, rollup_every: int = 10):
+        self.plugin = plugin
+        self.db_path = plugin.db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.rollup_every = rollup_every
+        self._buffer: list[tuple] = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._flush_count = 0
+        # 缓冲区由空变为非空时安排的定时落盘，避免冷清的群里事件长时间停留在内存中
+        self._flush_timer: asyncio.TimerHandle | None = None
+
+    def _init_database(self):
+        """初始化账本流水表与快照表。"""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS economy_ledger (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    group_id INTEGER NOT NULL,
+                    event_type TEXT NOT NULL,
+                    money_delta INTEGER DEFAULT 0,
+                    exp_delta INTEGER DEFAULT 0,
+                    item_name TEXT,
+                    item_delta INTEGER DEFAULT 0,
+                    created_time TEXT NOT NULL
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS economy_snapshots (
+                    user_id INTEGER NOT NULL,
+                    group_id INTEGER NOT NULL,
+                    money_earned INTEGER DEFAULT 0,
+                    money_spent INTEGER DEFAULT 0,
+                    exp_earned INTEGER DEFAULT 0,
+                    items_bought INTEGER DEFAULT 0,
+                    items_used INTEGER DEFAULT 0,
+                    event_count INTEGER DEFAULT 0,
+                    last_ledger_id INTEGER DEFAULT 0,
+                    updated_time TEXT,
+                    PRIMARY KEY (user_id, group_id)
+                )
+            """)
+            # 记录已汇总到的流水位置
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS economy_rollup_state (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    last_ledger_id INTEGER NOT NULL
+                )
+            """)
+            cursor.execute("INSERT OR IGNORE INTO economy_rollup_state (id, last_ledger_id) VALUES (1, 0)")
+            conn.commit()
+
+    def record(self, user_id: str, group_id: str, event_type: str, money_delta: int = 0, exp_delta: int = 0,
+               item_name: str | None = None, item_delta: int = 0):
+        """记录一条经济事件，仅写入内存缓冲区，必要时触发批量落盘。"""
+        entry = (int(user_id), int(group_id), event_type, money_delta, exp_delta, item_name, item_delta,
+                 datetime.now().isoformat())
+        # 对应的宠物写入回滚时，这条流水也不应入账
+        self.plugin.pet_system._after_commit(lambda: self._append(entry))
+
+    def _append(self, entry: tuple):
+        with self._lock:
+            self._buffer.append(entry)
+            should_flush = (len(self._buffer) >= self.batch_size
+                            or time.monotonic() - self._last_flush >= self.flush_interval)
+            if not should_flush:
+                self._schedule_flush()
+        if should_flush:
+            self.flush()
+
+    def _schedule_flush(self):
+        """在当前事件循环中安排一次定时落盘，调用方需持有 _lock。"""
+        if self._flush_timer is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 没有事件循环时只能依赖下一次记录或关闭时落盘
+            return
+        self._flush_timer = loop.call_later(self.flush_interval, self._on_flush_timer)
+
+    def _on_flush_timer(self):
+        with self._lock:
+            self._flush_timer = None
+        self.flush()
+
+    def flush(self, rollup: bool = False):
+        """
+        把缓冲区中的事件批量写入账本，每隔若干批次顺带执行一次汇总。
+        写入失败时把这批事件放回缓冲区稍后重试，不向记录方抛出异常：调用时宠物数据通常已经提交。
+        """
+        with self._lock:
+            entries, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+            if entries:
+                self._flush_count += 1
+            rollup = rollup or (bool(entries) and self._flush_count % self.rollup_every == 0)
+        if not entries and not rollup:
+            return
+
+        try:
+            with self.plugin.pet_system._connect() as conn:
+                if entries:
+                    conn.executemany(
+                        """INSERT INTO economy_ledger (user_id, group_id, event_type, money_delta, exp_delta,
+                                                       item_name, item_delta, created_time)
+                           VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                        entries)
+                if rollup:
+                    self._rollup(conn)
+                conn.commit()
+        except Exception as e:
+            logger.error(f"账本落盘失败，{len(entries)} 条事件已放回缓冲区: {e}")
+            self._requeue(entries)
+            return
+        # 按群执行模式下落盘随 tick 提交，tick 回滚时把这批流水放回缓冲区
+        self.plugin.pet_system._after_commit(on_rollback=lambda: self._requeue(entries))
+
+    def _requeue(self, entries: list[tuple]):
+        with self._lock:
+            self._buffer[:0] = entries
+            if self._buffer:
+                self._schedule_flush()
+
+    def _rollup(self, conn: sqlite3.Connection):
+        """把上次汇总之后的新流水累加进每位玩家的快照。"""
+        last_id = conn.execute("SELECT last_ledger_id FROM economy_rollup_state WHERE id = 1").fetchone()[0]
+        max_id = conn.execute("SELECT MAX(id) FROM economy_ledger").fetchone()[0]
+        if max_id is None or max_id <= last_id:
+            return
+
+        conn.execute("""
+            INSERT INTO economy_snapshots (user_id, group_id, money_earned, money_spent, exp_earned,
+                                           items_bought, items_used, event_count, last_ledger_id, updated_time)
+            SELECT user_id, group_id,
+                   SUM(MAX(money_delta, 0)), SUM(MAX(-money_delta, 0)), SUM(exp_delta),
+                   SUM(MAX(item_delta, 0)), SUM(MAX(-item_delta, 0)), COUNT(*), MAX(id), ?
+            FROM economy_ledger
+            WHERE id > ? AND id <= ?
+            GROUP BY user_id, group_id
+            ON CONFLICT(user_id, group_id) DO UPDATE SET
+                money_earned = money_earned + excluded.money_earned,
+                money_spent = money_spent + excluded.money_spent,
+                exp_earned = exp_earned + excluded.exp_earned,
+                items_bought = items_bought + excluded.items_bought,
+                items_used = items_used + excluded.items_used,
+                event_count = event_count + excluded.event_count,
+                last_ledger_id = excluded.last_ledger_id,
+                updated_time = excluded.updated_time
+        """, (datetime.now().isoformat(), last_id, max_id))
+        conn.execute("UPDATE economy_rollup_state SET last_ledger_id = ? WHERE id = 1", (max_id,))
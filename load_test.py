@@ -0,0 +1,397 @@
+"""
+压力测试工具：用合成玩家群体回放真实的指令组合。
+
+通过 `adopt_pet` 批量创建玩家，然后用伪造的事件对象并发驱动各模块的异步指令处理函数，
+最后报告吞吐量、各指令的 p50/p95/p99 延迟以及 SQLite busy/锁等待次数。
+
+用法（在插件目录的上一级执行）：
+    python -m astrbot_plugin_pet.load_test --users 2000 --groups 200 --ops 20000
+"""
+import argparse
+import asyncio
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+import traceback
+from pathlib import Path
+
+from .pet_system import PetSystem, VersionConflict
+from .battle_system import BattleSystem, At
+from .shop_system import ShopSystem, SHOP_ITEMS
+from .image_generator import ImageGenerator
+from .ledger_system import EconomyLedger
+from .cooldown_system import CooldownTracker
+from .render_service import RenderService
+from .group_actor import GroupActorManager
+from .archive_system import PetArchiver
+
+# 默认的指令组合（权重）
+DEFAULT_MIX = {"散步": 35, "对决": 10, "随机对决": 5, "购买": 20, "投喂": 15, "我的宠物": 15}
+
+
+class LoadTestStats:
+    """线程安全的统计收集器。"""
+
+    def __init__(self, lock_wait_threshold_ms: float):
+        self.lock = threading.Lock()
+        self.lock_wait_threshold_ms = lock_wait_threshold_ms
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        # 异常类型 -> 次数，每种类型只保留第一次出现时的调用栈
+        self.error_types: dict[str, int] = {}
+        self.first_tracebacks: dict[str, str] = {}
+        self.busy_errors = 0
+        # 与 PetPlugin._run 一致，VersionConflict 以"请稍后再试"回复玩家，单独计数而不算作错误
+        self.conflict_replies = 0
+        self.lock_waits = 0
+        self.lock_wait_ms = 0.0
+
+    def record_command(self, command: str, elapsed_ms: float, error: BaseException | None = None):
+        with self.lock:
+            self.latencies.setdefault(command, []).append(elapsed_ms)
+            if error is None:
+                return
+            self.errors[command] = self.errors.get(command, 0) + 1
+            error_type = f"{command}: {type(error).__name__}"
+            self.error_types[error_type] = self.error_types.get(error_type, 0) + 1
+            if error_type not in self.first_tracebacks:
+                self.first_tracebacks[error_type] = "".join(
+                    traceback.format_exception(type(error), error, error.__traceback__))
+
+    def record_conflict(self, command: str, elapsed_ms: float):
+        with self.lock:
+            self.latencies.setdefault(command, []).append(elapsed_ms)
+            self.conflict_replies += 1
+
+    def record_statement(self, sql: str, elapsed_ms: float, busy: bool = False):
+        is_write = not sql.lstrip().upper().startswith("SELECT")
+        with self.lock:
+            if busy:
+                self.busy_errors += 1
+            elif is_write and elapsed_ms >= self.lock_wait_threshold_ms:
+                # 写语句耗时超过阈值，基本都是在等待写锁
+                self.lock_waits += 1
+                self.lock_wait_ms += elapsed_ms
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _instrumented_factory(stats: LoadTestStats):
+    """构造一个记录语句耗时与 busy 错误的 sqlite3 连接类。"""
+
+    def _timed(sql, run):
+        start = time.perf_counter()
+        try:
+            result = run()
+        except sqlite3.OperationalError as e:
+            message = str(e).lower()
+            if "locked" in message or "busy" in message:
+                stats.record_statement(sql, (time.perf_counter() - start) * 1000, busy=True)
+            raise
+        stats.record_statement(sql, (time.perf_counter() - start) * 1000)
+        return result
+
+    class InstrumentedCursor(sqlite3.Cursor):
+        def execute(self, sql, parameters=()):
+            return _timed(sql, lambda: super(InstrumentedCursor, self).execute(sql, parameters))
+
+        def executemany(self, sql, seq_of_parameters):
+            return _timed(sql, lambda: super(InstrumentedCursor, self).executemany(sql, seq_of_parameters))
+
+    class InstrumentedConnection(sqlite3.Connection):
+        def cursor(self, factory=InstrumentedCursor):
+            return super().cursor(factory)
+
+        def execute(self, sql, parameters=()):
+            return self.cursor().execute(sql, parameters)
+
+        def executemany(self, sql, seq_of_parameters):
+            return self.cursor().executemany(sql, seq_of_parameters)
+
+    return InstrumentedConnection
+
+
+class FakeEvent:
+    """模拟 AstrMessageEvent 的最小接口，供指令处理函数使用。"""
+
+    def __init__(self, user_id: str, group_id: str, messages: list | None = None):
+        self.user_id = user_id
+        self.group_id = group_id
+        self.messages = messages or []
+        self.unified_msg_origin = f"loadtest:GroupMessage:{group_id}"
+
+    def get_sender_id(self) -> str:
+        return self.user_id
+
+    def get_group_id(self) -> str:
+        return self.group_id
+
+    def get_sender_name(self) -> str:
+        return f"玩家{self.user_id}"
+
+    def get_self_id(self) -> str:
+        return "0"
+
+    def get_messages(self) -> list:
+        return self.messages
+
+    def plain_result(self, text: str):
+        return ("plain", text)
+
+    def image_result(self, path: str):
+        return ("image", path)
+
+
+class LoadTestPlugin:
+    """与 PetPlugin 结构一致的宿主对象，但不依赖 AstrBot 运行时。"""
+
+    def __init__(self, data_dir: Path, actor_mode: bool = False, tick_ms: int = 50):
+        self.data_dir = data_dir
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_dir = self.data_dir / "cache"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.assets_dir = Path(__file__).parent / "assets"
+        self.db_path = self.data_dir / "pets.db"
+
+        self.pet_system = PetSystem(self)
+        self.battle_system = BattleSystem(self)
+        self.shop_system = ShopSystem(self)
+        self.image_generator = ImageGenerator(self)
+        self.economy_ledger = EconomyLedger(self)
+        self.cooldown_tracker = CooldownTracker(self)
+        self.render_service = RenderService(self)
+        self.pet_archiver = PetArchiver(self, inactive_days=0)
+        self.group_actors = GroupActorManager(self, enabled=actor_mode, tick_ms=tick_ms)
+
+        self.pet_system._init_database()
+        self.economy_ledger._init_database()
+        self.cooldown_tracker.load()
+
+
+class LoadTester:
+    def __init__(self, plugin: LoadTestPlugin, users: int, groups: int, mix: dict[str, int],
+                 stats: LoadTestStats):
+        self.plugin = plugin
+        self.stats = stats
+        self.mix_names = list(mix.keys())
+        self.mix_weights = list(mix.values())
+        # 玩家均匀分布到各个群里
+        self.players = [(str(100000 + i), str(900000 + i % groups)) for i in range(users)]
+        self.players_by_group: dict[str, list[str]] = {}
+        for user_id, group_id in self.players:
+            self.players_by_group.setdefault(group_id, []).append(user_id)
+        self.food_items = [name for name, item in SHOP_ITEMS.items() if item.get('type') == 'food']
+
+    async def populate(self, money: int):
+        """通过 adopt_pet 创建合成玩家，并补足初始资金。"""
+        for user_id, group_id in self.players:
+            async for _ in self.plugin.pet_system.adopt_pet(FakeEvent(user_id, group_id)):
+                pass
+        with sqlite3.connect(self.plugin.db_path) as conn:
+            conn.execute("UPDATE pets SET money = ?", (money,))
+            conn.commit()
+
+    def _build_command(self, command: str, user_id: str, group_id: str):
+        plugin = self.plugin
+        if command == "散步":
+            return plugin.battle_system.walk_pet(FakeEvent(user_id, group_id))
+        if command == "对决":
+            opponents = [uid for uid in self.players_by_group[group_id] if uid != user_id]
+            target = random.choice(opponents) if opponents else user_id
+            return plugin.battle_system.duel_pet(FakeEvent(user_id, group_id, [At(qq=target)]))
+        if command == "随机对决":
+            return plugin.battle_system.random_duel(FakeEvent(user_id, group_id))
+        if command == "购买":
+            return plugin.shop_system.buy_item(FakeEvent(user_id, group_id), random.choice(self.food_items), 1)
+        if command == "投喂":
+            return plugin.shop_system.feed_pet_item(FakeEvent(user_id, group_id), random.choice(self.food_items))
+        if command == "我的宠物":
+            return plugin.pet_system.my_pet_status(FakeEvent(user_id, group_id))
+        raise ValueError(f"未知的指令: {command}")
+
+    async def _run_one(self):
+        command = random.choices(self.mix_names, weights=self.mix_weights)[0]
+        user_id, group_id = random.choice(self.players)
+        start = time.perf_counter()
+        error = None
+        try:
+            agen = self._build_command(command, user_id, group_id)
+            async for _ in self.plugin.group_actors.dispatch(group_id, agen):
+                pass
+        except VersionConflict:
+            self.stats.record_conflict(command, (time.perf_counter() - start) * 1000)
+            return
+        except Exception as e:
+            error = e
+        self.stats.record_command(command, (time.perf_counter() - start) * 1000, error)
+
+    async def run_worker(self, ops: int, concurrency: int):
+        """在当前事件循环中以指定并发度执行 ops 条指令。"""
+        remaining = ops
+
+        async def _loop():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                await self._run_one()
+                # 让出事件循环，模拟真实场景中指令交错执行
+                await asyncio.sleep(0)
+
+        await asyncio.gather(*(_loop() for _ in range(concurrency)))
+
+
+def _parse_mix(text: str | None) -> dict[str, int]:
+    if not text:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise SystemExit(f"未知的指令: {name}，可选: {'/'.join(DEFAULT_MIX)}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def run_load_test(users: int, groups: int, ops: int, workers: int, concurrency: int,
+                  mix: dict[str, int], money: int = 1000, data_dir: Path | None = None,
+                  lock_wait_threshold_ms: float = 5.0, actor_mode: bool = False, tick_ms: int = 50) -> dict:
+    """
+    执行一次压力测试并返回统计结果。
+    普通模式下每个线程模拟一个独立的机器人进程：各自持有一个插件实例，只共享数据库文件；
+    插件内的冷却表、候选缓存等结构只在所属的事件循环中访问，不能跨线程共享。
+    """
+    data_dir = data_dir or Path(tempfile.mkdtemp(prefix="pet_loadtest_"))
+    plugin = LoadTestPlugin(data_dir, actor_mode, tick_ms)
+    stats = LoadTestStats(lock_wait_threshold_ms)
+    tester = LoadTester(plugin, users, max(1, groups), mix, stats)
+
+    populate_start = time.perf_counter()
+    asyncio.run(tester.populate(money))
+    populate_seconds = time.perf_counter() - populate_start
+
+    # 建档完成后再创建其余实例，启动时从数据库重建的冷却表才与建档结果一致
+    plugins = [plugin] if actor_mode else [plugin] + [LoadTestPlugin(data_dir) for _ in range(workers - 1)]
+
+    # 仅在压测阶段替换连接工厂，统计 busy 与锁等待
+    original_connect = sqlite3.connect
+    factory = _instrumented_factory(stats)
+    sqlite3.connect = lambda *args, **kwargs: original_connect(*args, factory=factory, **kwargs)
+    try:
+        if actor_mode:
+            # 按群执行模式下所有指令共享同一个事件循环与 tick 连接
+            async def _run_actor_mode():
+                await tester.run_worker(ops, concurrency * workers)
+                await plugin.group_actors.stop()
+            threads = [threading.Thread(target=asyncio.run, args=(_run_actor_mode(),))]
+        else:
+            per_worker = [ops // workers + (1 if i < ops % workers else 0) for i in range(workers)]
+            threads = [
+                threading.Thread(target=asyncio.run, args=(
+                    LoadTester(worker_plugin, users, max(1, groups), mix, stats).run_worker(n, concurrency),))
+                for worker_plugin, n in zip(plugins, per_worker)
+            ]
+        run_start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        run_seconds = time.perf_counter() - run_start
+        for worker_plugin in plugins:
+            worker_plugin.economy_ledger.flush(rollup=True)
+    finally:
+        for worker_plugin in plugins:
+            worker_plugin.render_service.shutdown()
+        sqlite3.connect = original_connect
+
+    concurrency_stats = {}
+    for worker_plugin in plugins:
+        for key, value in worker_plugin.pet_system.concurrency_stats.items():
+            concurrency_stats[key] = concurrency_stats.get(key, 0) + value
+
+    commands = {}
+    all_latencies = []
+    for command, values in stats.latencies.items():
+        values.sort()
+        all_latencies.extend(values)
+        commands[command] = {
+            "count": len(values),
+            "errors": stats.errors.get(command, 0),
+            "p50": _percentile(values, 50),
+            "p95": _percentile(values, 95),
+            "p99": _percentile(values, 99),
+        }
+    all_latencies.sort()
+    return {
+        "data_dir": str(data_dir),
+        "populate_seconds": populate_seconds,
+        "run_seconds": run_seconds,
+        "throughput": ops / run_seconds if run_seconds > 0 else 0.0,
+        "p50": _percentile(all_latencies, 50),
+        "p95": _percentile(all_latencies, 95),
+        "p99": _percentile(all_latencies, 99),
+        "busy_errors": stats.busy_errors,
+        "lock_waits": stats.lock_waits,
+        "lock_wait_ms": stats.lock_wait_ms,
+        "concurrency": concurrency_stats,
+        "conflict_replies": stats.conflict_replies,
+        "tick_commits": plugin.group_actors.batcher.commits if actor_mode else None,
+        "commands": commands,
+        "error_types": dict(stats.error_types),
+        "first_tracebacks": dict(stats.first_tracebacks),
+    }
+
+
+def _print_report(report: dict):
+    print(f"数据目录: {report['data_dir']}")
+    print(f"建档耗时: {report['populate_seconds']:.2f}s")
+    print(f"压测耗时: {report['run_seconds']:.2f}s  吞吐量: {report['throughput']:.1f} ops/s")
+    print(f"总体延迟(ms): p50={report['p50']:.2f} p95={report['p95']:.2f} p99={report['p99']:.2f}")
+    print(f"SQLite busy 错误: {report['busy_errors']}  "
+          f"锁等待: {report['lock_waits']} 次 / {report['lock_wait_ms']:.1f}ms")
+    concurrency = report['concurrency']
+    print(f"乐观并发: 版本冲突 {concurrency['conflicts']} 次  繁忙重试 {concurrency['busy']} 次  "
+          f"重试耗尽 {concurrency['exhausted']} 次  冲突回复 {report['conflict_replies']} 次")
+    if report['tick_commits'] is not None:
+        print(f"按群执行: 批量提交 {report['tick_commits']} 次")
+    print("--------------------")
+    for command, row in sorted(report['commands'].items()):
+        print(f"{command:<6} n={row['count']:<7} err={row['errors']:<5} "
+              f"p50={row['p50']:.2f} p95={row['p95']:.2f} p99={row['p99']:.2f}")
+    if report['error_types']:
+        print("--------------------")
+        for error_type, count in sorted(report['error_types'].items()):
+            print(f"{error_type} x {count}，首次出现的调用栈:")
+            print(report['first_tracebacks'][error_type])
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="群宠物插件压力测试工具")
+    parser.add_argument("--users", type=int, default=2000, help="合成玩家数量")
+    parser.add_argument("--groups", type=int, default=200, help="群数量")
+    parser.add_argument("--ops", type=int, default=20000, help="总指令数")
+    parser.add_argument("--workers", type=int, default=4, help="并发线程数（每个线程一个事件循环与插件实例，模拟多个机器人进程）")
+    parser.add_argument("--concurrency", type=int, default=16, help="每个事件循环内的并发任务数")
+    parser.add_argument("--mix", type=str, default=None, help="指令组合，例如 散步=40,对决=10,购买=20")
+    parser.add_argument("--money", type=int, default=1000, help="建档后为每位玩家设置的金钱")
+    parser.add_argument("--data-dir", type=Path, default=None, help="数据库目录，默认使用临时目录")
+    parser.add_argument("--lock-wait-ms", type=float, default=5.0, help="写语句耗时超过该值视为锁等待")
+    parser.add_argument("--actor-mode", action="store_true", help="开启按群执行模式（所有并发任务运行在同一个事件循环中）")
+    parser.add_argument("--tick-ms", type=int, default=50, help="按群执行模式下的批量提交周期")
+    args = parser.parse_args(argv)
+
+    report = run_load_test(args.users, args.groups, args.ops, max(1, args.workers), max(1, args.concurrency),
+                           _parse_mix(args.mix), args.money, args.data_dir, args.lock_wait_ms,
+                           args.actor_mode, args.tick_ms)
+    _print_report(report)
+
+
+if __name__ == "__main__":
+    main()
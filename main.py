@@ -11,13 +11,19 @@ from astrbot.api.star import Context, Star, register
 from astrbot.core.message.components import At
 from astrbot.core.platform.sources.aiocqhttp.aiocqhttp_message_event import AiocqhttpMessageEvent
 from astrbot.core.star import StarTools  # 确保导入 StarTools
-from astrbot.api import logger
+from astrbot.api import logger, AstrBotConfig
 
 # 导入各个功能模块
-from .pet_system import PetSystem, PET_TYPES
+from .pet_system import PetSystem, PET_TYPES, VersionConflict
 from .battle_system import BattleSystem
 from .shop_system import ShopSystem
 from .image_generator import ImageGenerator
+from .ledger_system import EconomyLedger
+from .cooldown_system import CooldownTracker
+from .render_service import RenderService
+from .profiler import CommandProfiler
+from .group_actor import GroupActorManager, TickCommitFailed
+from .archive_system import PetArchiver
 
 @register(
     "chongwu",
@@ -27,8 +33,9 @@ from .image_generator import ImageGenerator
     "https://github.com/520TinyXI/ZRG.git"
 )
 class PetPlugin(Star):
-    def __init__(self, context: Context):
+    def __init__(self, context: Context, config: AstrBotConfig | None = None):
         super().__init__(context)
+        self.config = config or {}
         # --- 修复：使用 StarTools 获取数据目录 ---
         self.data_dir = StarTools.get_data_dir("astrbot_plugin_pet")
         self.data_dir.mkdir(parents=True, exist_ok=True)
@@ -46,56 +53,120 @@ class PetPlugin(Star):
         self.battle_system = BattleSystem(self)
         self.shop_system = ShopSystem(self)
         self.image_generator = ImageGenerator(self)
+        self.economy_ledger = EconomyLedger(self)
+        self.cooldown_tracker = CooldownTracker(self)
+        self.render_service = RenderService(
+            self,
+            workers=self.config.get("render_workers", 2),
+            max_pending=self.config.get("render_max_pending", 8),
+            timeout=self.config.get("render_timeout", 10.0),
+        )
+        self.profiler = CommandProfiler(
+            self,
+            commands=self.config.get("profiling_commands", []),
+            sample_rate=self.config.get("profiling_sample_rate", 1.0),
+            max_files=self.config.get("profiling_max_files", 200),
+        )
+        self.pet_archiver = PetArchiver(
+            self,
+            inactive_days=self.config.get("archive_inactive_days", 60),
+            interval_hours=self.config.get("archive_interval_hours", 24.0),
+        )
+        self.group_actors = GroupActorManager(
+            self,
+            enabled=self.config.get("group_actor_mode", False),
+            tick_ms=self.config.get("group_actor_tick_ms", 50),
+        )
         
         # 初始化数据库
         self.pet_system._init_database()
+        self.economy_ledger._init_database()
+        self.cooldown_tracker.load()
         
         logger.info("群宠物养成插件已加载。")
         
+    async def _run(self, command: str, event: AstrMessageEvent, agen):
+        """执行一条指令：按需进行性能分析，开启按群执行模式时交给所在群的 actor 顺序处理。"""
+        self.pet_archiver.ensure_started()
+        self.cooldown_tracker.ensure_started()
+        try:
+            async for result in self.group_actors.dispatch(event.get_group_id(), self.profiler.wrap(command, agen)):
+                yield result
+            group_id = event.get_group_id()
+            if group_id:
+                # 只有主人自己的指令才刷新活跃时间，归档据此判断
+                self.pet_system.touch_active(event.get_sender_id(), group_id)
+        except VersionConflict:
+            # 乐观并发重试耗尽或对决双方已被其他实例占用，通常是同一只宠物正被密集地修改
+            yield event.plain_result("宠物的状态刚刚发生了变化，请稍后再试。")
+        except TickCommitFailed:
+            # 本 tick 的写入整体回滚，指令的结果与副作用都已作废
+            yield event.plain_result("保存数据时发生错误，本次操作未生效，请稍后再试。")
+
     # --- 命令注册 ---
     @filter.command("领养宠物")
     async def adopt_pet(self, event: AstrMessageEvent, pet_name: str | None = None):
-        async for result in self.pet_system.adopt_pet(event, pet_name):
+        async for result in self._run("领养宠物", event, self.pet_system.adopt_pet(event, pet_name)):
             yield result
             
     @filter.command("我的宠物")
     async def my_pet_status(self, event: AstrMessageEvent):
-        async for result in self.pet_system.my_pet_status(event):
+        async for result in self._run("我的宠物", event, self.pet_system.my_pet_status(event)):
+            yield result
+            
+    @filter.command("我的所有宠物")
+    async def all_my_pets(self, event: AstrMessageEvent):
+        async for result in self._run("我的所有宠物", event, self.pet_system.all_my_pets(event)):
+            yield result
+            
+    @filter.command("群宠物总览")
+    async def group_overview(self, event: AstrMessageEvent, page: int = 1):
+        async for result in self._run("群宠物总览", event, self.pet_system.group_overview(event, page)):
             yield result
             
     @filter.command("宠物进化")
     async def evolve_pet(self, event: AstrMessageEvent):
-        async for result in self.pet_system.evolve_pet(event):
+        async for result in self._run("宠物进化", event, self.pet_system.evolve_pet(event)):
             yield result
             
     @filter.command("散步")
     async def walk_pet(self, event: AstrMessageEvent):
-        async for result in self.battle_system.walk_pet(event):
+        async for result in self._run("散步", event, self.battle_system.walk_pet(event)):
             yield result
             
     @filter.command("对决")
     async def duel_pet(self, event: AiocqhttpMessageEvent):
-        async for result in self.battle_system.duel_pet(event):
+        async for result in self._run("对决", event, self.battle_system.duel_pet(event)):
+            yield result
+            
+    @filter.command("随机对决")
+    async def random_duel(self, event: AstrMessageEvent):
+        async for result in self._run("随机对决", event, self.battle_system.random_duel(event)):
             yield result
             
     @filter.command("宠物商店")
     async def shop(self, event: AstrMessageEvent):
-        async for result in self.shop_system.shop(event):
+        async for result in self._run("宠物商店", event, self.shop_system.shop(event)):
             yield result
             
     @filter.command("宠物背包")
     async def backpack(self, event: AstrMessageEvent):
-        async for result in self.shop_system.backpack(event):
+        async for result in self._run("宠物背包", event, self.shop_system.backpack(event)):
             yield result
             
     @filter.command("购买")
     async def buy_item(self, event: AstrMessageEvent, item_name: str, quantity: int = 1):
-        async for result in self.shop_system.buy_item(event, item_name, quantity):
+        async for result in self._run("购买", event, self.shop_system.buy_item(event, item_name, quantity)):
             yield result
             
     @filter.command("投喂")
     async def feed_pet_item(self, event: AstrMessageEvent, item_name: str):
-        async for result in self.shop_system.feed_pet_item(event, item_name):
+        async for result in self._run("投喂", event, self.shop_system.feed_pet_item(event, item_name)):
+            yield result
+            
+    @filter.command("冷却提醒")
+    async def cooldown_reminder(self, event: AstrMessageEvent, action: str = "开启"):
+        async for result in self._run("冷却提醒", event, self.cooldown_tracker.toggle_reminder(event, action)):
             yield result
             
     @filter.command("宠物菜单")
@@ -111,6 +182,12 @@ class PetPlugin(Star):
     /我的宠物
     功能：以图片形式查看你当前宠物的详细状态。
 
+    /我的所有宠物
+    功能：以一张图片汇总查看你在所有群里的宠物与金钱。
+
+    /群宠物总览 [页码]
+    功能：以图片形式分页查看本群所有宠物的等级与属性。
+
     /宠物进化
     功能：当宠物达到指定等级时，让它进化成更强的形态（烈焰→炽焰龙、碧波兽→瀚海蛟、莲莲草→百草王、碎裂岩→岩脊守护者、金刚→破甲金刚）。
 
@@ -124,6 +201,12 @@ class PetPlugin(Star):
     /对决 @某人
     功能：与群内其他玩家的宠物进行一场1v1对决，有30分钟冷却时间。
 
+    /随机对决
+    功能：自动匹配一位同群、等级相近且冷却已结束的对手进行对决。
+
+    /冷却提醒 [开启|关闭]
+    功能：散步或对决冷却结束时在群里@你提醒。
+
     【商店与喂养】
     /宠物商店
     功能：查看所有可以购买的商品及其价格和效果。
@@ -136,6 +219,46 @@ class PetPlugin(Star):
     """
         yield event.plain_result(menu_text)
 
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @filter.command("宠物性能分析")
+    async def profiling(self, event: AstrMessageEvent, action: str = "状态", command_names: str = "全部",
+                        sample_rate: float = -1.0):
+        """管理员开关指令级性能分析。用法: /宠物性能分析 [开启|关闭|状态] [指令名,逗号分隔|全部] [采样率]"""
+        all_commands = ["领养宠物", "我的宠物", "我的所有宠物", "群宠物总览", "宠物进化", "散步", "对决", "随机对决", "宠物商店", "宠物背包", "购买", "投喂"]
+        commands = all_commands if command_names == "全部" else [
+            name.strip() for name in re.split(r"[,，]", command_names) if name.strip() in all_commands]
+
+        if action == "开启":
+            if not commands:
+                yield event.plain_result(f"没有可分析的指令，可选: {'、'.join(all_commands)}")
+                return
+            self.profiler.enable(commands, sample_rate if sample_rate >= 0 else None)
+        elif action == "关闭":
+            self.profiler.disable(None if command_names == "全部" else commands)
+
+        enabled = "、".join(sorted(self.profiler.enabled_commands)) or "无"
+        concurrency = self.pet_system.concurrency_stats
+        yield event.plain_result(
+            f"性能分析中的指令: {enabled}\n采样率: {self.profiler.sample_rate}\n输出目录: {self.profiler.output_dir}\n"
+            f"乐观并发: 版本冲突 {concurrency['conflicts']} 次，繁忙重试 {concurrency['busy']} 次，"
+            f"重试耗尽 {concurrency['exhausted']} 次"
+            + (f"\n按群执行: 已处理 {self.group_actors.commands} 条指令，批量提交 {self.group_actors.batcher.commits} 次"
+               if self.group_actors.enabled else ""))
+
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @filter.command("宠物归档")
+    async def archive(self, event: AstrMessageEvent, action: str = "状态", inactive_days: int = -1):
+        """管理员查看归档状态或立即归档不活跃的宠物。用法: /宠物归档 [状态|执行] [不活跃天数]"""
+        async for result in self.pet_archiver.archive_command(event, action, inactive_days):
+            yield result
+
     async def terminate(self):
         """插件卸载/停用时调用。"""
+        # 先提交按群执行模式下尚未结束的 tick
+        await self.group_actors.stop()
+        # 落盘账本中尚未写入的事件并做最后一次汇总
+        self.economy_ledger.flush(rollup=True)
+        await self.cooldown_tracker.stop()
+        await self.pet_archiver.stop()
+        self.render_service.shutdown()
         logger.info("群宠物养成插件已卸载。")
\ No newline at end of file
@@ -1,6 +1,7 @@
+import asyncio
 import sqlite3
 import random
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from pathlib import Path
 
 # --- 静态游戏数据定义 ---
@@ -60,11 +61,56 @@ STAT_MAP = {
     "satiety": "饱食度"
 }
 
+# --- 静态游戏数据定义 (属性克制关系) ---
+ATTRIBUTE_EFFECTIVENESS = {
+    "金": "木",  # 金克木
+    "木": "土",  # 木克土
+    "土": "水",  # 土克水
+    "水": "火",  # 水克火
+    "火": "金"   # 火克金
+}
+ADVANTAGE_MULTIPLIER = 1.2  # 克制，伤害加成20%
+DISADVANTAGE_MULTIPLIER = 0.8  # 被克制，伤害减少20%
+
+# --- 静态游戏数据定义 (成长数值) ---
+LEVEL_UP_STAT_GAIN = (1, 2)  # 每次升级攻防各自随机增加的范围
+EVOLUTION_STAT_GAIN = (8, 15)  # 进化时攻防各自随机增加的范围
+
+# --- 乐观并发参数 ---
+MAX_WRITE_ATTEMPTS = 5  # 版本冲突或数据库繁忙时的最大尝试次数
+RETRY_BASE_DELAY = 0.01  # 重试退避的基准秒数，每次翻倍并加入随机抖动
+
+# --- 离线衰减与群总览参数 ---
+SATIETY_DECAY_PER_HOUR = 3  # 每小时降低3点饱食度
+MOOD_DECAY_PER_HOUR = 2  # 每小时降低2点心情
+OVERVIEW_PAGE_SIZE = 20  # 群宠物总览每页的宠物数量
+
+class VersionConflict(Exception):
+    """条件更新时宠物的版本号已被其他实例修改。"""
+
 class PetSystem:
     def __init__(self, plugin):
         self.plugin = plugin
         self.db_path = plugin.db_path
+        # 乐观并发计数：版本冲突、数据库繁忙、重试耗尽
+        self.concurrency_stats = {"conflicts": 0, "busy": 0, "exhausted": 0}
+        # 当天已记录过活跃时间的玩家，每人每天最多写入一次
+        self._active_day: str | None = None
+        self._active_today: set[tuple[int, int]] = set()
         
+    def _connect(self):
+        """获取数据库连接；开启按群执行模式时返回本 tick 共享的连接，写入在 tick 结束时统一提交。"""
+        group_actors = getattr(self.plugin, "group_actors", None)
+        return (group_actors and group_actors.connection()) or sqlite3.connect(self.db_path)
+
+    def _after_commit(self, callback=None, on_rollback=None):
+        """在本次写入真正提交后再更新内存状态；不在 tick 中时立即执行，tick 回滚时改为执行 on_rollback。"""
+        group_actors = getattr(self.plugin, "group_actors", None)
+        if group_actors:
+            group_actors.after_commit(callback, on_rollback)
+        elif callback:
+            callback()
+
     def _init_database(self):
         """初始化数据库，创建宠物表。"""
         with sqlite3.connect(self.db_path) as conn:
@@ -87,6 +133,8 @@ class PetSystem:
                     last_duel_time TEXT,
                     money INTEGER DEFAULT 50,
                     last_updated_time TEXT,
+                    version INTEGER NOT NULL DEFAULT 0,
+                    last_active_time TEXT,
                     PRIMARY KEY (user_id, group_id)
                 )
             """)
@@ -101,13 +149,115 @@ class PetSystem:
                     PRIMARY KEY (user_id, group_id, item_name)
                 )
             """)
+
+            # 旧版本数据库补充乐观并发使用的版本号字段
+            columns = {row[1] for row in cursor.execute("PRAGMA table_info(pets)")}
+            if "version" not in columns:
+                cursor.execute("ALTER TABLE pets ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            # 主人最后一次使用指令的时间，归档只看这一列；旧数据以最后一次状态更新时间作为初值
+            if "last_active_time" not in columns:
+                cursor.execute("ALTER TABLE pets ADD COLUMN last_active_time TEXT")
+                cursor.execute("UPDATE pets SET last_active_time = COALESCE(last_updated_time, last_fed_time)")
+
+            # 随机对决按 群 + 等级区间 + 冷却时间 查找候选对手
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_pets_group_level_duel
+                ON pets (group_id, level, last_duel_time)
+            """)
+
+            # 跨群查看玩家的所有宠物，索引包含查询需要的全部列，无需回表
+            cursor.execute("DROP INDEX IF EXISTS idx_pets_user")
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_pets_user_profile
+                ON pets (user_id, group_id, pet_name, pet_type, level, evolution_stage, money)
+            """)
             conn.commit()
             
-    def _get_pet(self, user_id: str, group_id: str) -> dict | None:
+    def touch_active(self, user_id: str, group_id: str):
+        """
+        记录玩家本人在该群使用了指令。
+        只由玩家自己的指令调用，其他玩家的查看、对决等读取不会让宠物保持活跃。
+        """
+        today = date.today().isoformat()
+        if today != self._active_day:
+            self._active_day, self._active_today = today, set()
+        key = (int(user_id), int(group_id))
+        if key in self._active_today:
+            return
+        with self._connect() as conn:
+            cursor = conn.execute("UPDATE pets SET last_active_time = ? WHERE user_id = ? AND group_id = ?",
+                                  (datetime.now().isoformat(), *key))
+            conn.commit()
+        # 还没有宠物时不记录，领养或恢复归档后的第一条指令仍会写入
+        if cursor.rowcount:
+            self._active_today.add(key)
+
+    async def _retry(self, operation):
+        """
+        执行一次乐观并发操作，遇到版本冲突或数据库繁忙时带随机抖动地有限重试。
+        退避期间让出事件循环，不阻塞其他指令。
+        """
+        for attempt in range(MAX_WRITE_ATTEMPTS):
+            try:
+                return operation()
+            except VersionConflict:
+                self.concurrency_stats["conflicts"] += 1
+            except sqlite3.OperationalError as e:
+                message = str(e).lower()
+                if "locked" not in message and "busy" not in message:
+                    raise
+                self.concurrency_stats["busy"] += 1
+            if attempt + 1 < MAX_WRITE_ATTEMPTS:
+                # 退避期间让所在群的 actor 先处理后续指令
+                group_actors = getattr(self.plugin, "group_actors", None)
+                if group_actors:
+                    group_actors.release()
+                await asyncio.sleep(random.uniform(0, RETRY_BASE_DELAY * 2 ** attempt))
+        self.concurrency_stats["exhausted"] += 1
+        raise VersionConflict("重试次数已用尽")
+
+    async def _versioned_update(self, user_id: str, group_id: str, pet: dict, build) -> dict | None:
+        """
+        以乐观并发方式更新一只宠物。
+        build(pet) 根据当前数据返回 (SET 子句, 参数)，返回 None 表示前置条件已不满足。
+        写入只在版本号未变时生效，冲突时重新读取数据再次调用 build。
+        成功时返回写入所依据的宠物数据，前置条件不满足时返回 None。
+        """
+        state = {"pet": pet}
+
+        def attempt():
+            # 重新读取时的衰减冲突同样交给外层重试
+            current = state["pet"] or self._load_pet(user_id, group_id, restore_archived=False)
+            # 本次失败时，下一次重试需要重新读取
+            state["pet"] = None
+            if not current:
+                return None
+            update = build(current)
+            if update is None:
+                return None
+            set_clause, params = update
+            with self._connect() as conn:
+                cursor = conn.execute(
+                    f"UPDATE pets SET {set_clause}, version = version + 1 "
+                    f"WHERE user_id = ? AND group_id = ? AND version = ?",
+                    (*params, int(user_id), int(group_id), current['version']))
+                if cursor.rowcount == 0:
+                    raise VersionConflict()
+                conn.commit()
+            return current
+
+        return await self._retry(attempt)
+
+    async def _get_pet(self, user_id: str, group_id: str, restore_archived: bool = True) -> dict | None:
         """
         根据ID获取宠物信息，并自动处理离线期间的状态衰减。
+        只有主人自己的指令才会恢复归档的宠物；读取其他玩家的宠物时传入 restore_archived=False，归档的宠物视为没有宠物。
         """
-        with sqlite3.connect(self.db_path) as conn:
+        return await self._retry(lambda: self._load_pet(user_id, group_id, restore_archived))
+
+    def _load_pet(self, user_id: str, group_id: str, restore_archived: bool = True) -> dict | None:
+        """读取宠物并写入离线衰减，衰减写入与其他实例冲突时抛出 VersionConflict。"""
+        with self._connect() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
 
@@ -115,40 +265,32 @@ class PetSystem:
             cursor.execute("SELECT * FROM pets WHERE user_id = ? AND group_id = ?", (int(user_id), int(group_id)))
             row = cursor.fetchone()
             if not row:
-                return None
+                # 长期不活跃后被归档的宠物在玩家回归时移回主库
+                archiver = getattr(self.plugin, "pet_archiver", None)
+                if not restore_archived or not archiver or not archiver.restore(conn, user_id, group_id):
+                    return None
+                cursor.execute("SELECT * FROM pets WHERE user_id = ? AND group_id = ?", (int(user_id), int(group_id)))
+                row = cursor.fetchone()
 
             pet_dict = dict(row)
             now = datetime.now()
 
-            # 初始化或获取上次更新时间
-            last_updated_str = pet_dict.get('last_updated_time')
-            if not last_updated_str:
-                last_updated_time = now
-                # 首次为新字段写入当前时间
-                cursor.execute("UPDATE pets SET last_updated_time = ? WHERE user_id = ? AND group_id = ?",
-                               (now.isoformat(), int(user_id), int(group_id)))
-            else:
-                last_updated_time = datetime.fromisoformat(last_updated_str)
-
             # 计算离线时间并应用衰减
-            hours_passed = (now - last_updated_time).total_seconds() / 3600
-            if hours_passed >= 1:
-                hours_to_decay = int(hours_passed)
-                satiety_decay = 3 * hours_to_decay  # 每小时降低3点饱食度
-                mood_decay = 2 * hours_to_decay  # 每小时降低2点心情
-
-                # 计算新值，确保不低于0
-                new_satiety = max(0, pet_dict['satiety'] - satiety_decay)
-                new_mood = max(0, pet_dict['mood'] - mood_decay)
-
-                # 更新数据库
+            decayed = self._decay(pet_dict, now)
+            if decayed:
+                new_satiety, new_mood = decayed
                 cursor.execute(
-                    "UPDATE pets SET satiety = ?, mood = ?, last_updated_time = ? WHERE user_id = ? AND group_id = ?",
-                    (new_satiety, new_mood, now.isoformat(), int(user_id), int(group_id))
+                    "UPDATE pets SET satiety = ?, mood = ?, last_updated_time = ?, version = version + 1 "
+                    "WHERE user_id = ? AND group_id = ? AND version = ?",
+                    (new_satiety, new_mood, now.isoformat(), int(user_id), int(group_id), pet_dict['version'])
                 )
+                if cursor.rowcount == 0:
+                    raise VersionConflict()
                 # 更新返回给程序的字典
                 pet_dict['satiety'] = new_satiety
                 pet_dict['mood'] = new_mood
+                pet_dict['last_updated_time'] = now.isoformat()
+                pet_dict['version'] += 1
 
             conn.commit()
 
@@ -159,39 +301,139 @@ class PetSystem:
 
             return pet_dict
             
+    def _decay(self, pet: dict, now: datetime) -> tuple[int, int] | None:
+        """
+        计算离线衰减后的 (饱食度, 心情)，需要写回数据库时返回新值，否则返回 None。
+        首次读取没有更新时间的宠物只需要记录当前时间，数值保持不变。
+        """
+        last_updated_str = pet.get('last_updated_time')
+        if not last_updated_str:
+            return pet['satiety'], pet['mood']
+
+        hours_to_decay = int((now - datetime.fromisoformat(last_updated_str)).total_seconds() / 3600)
+        if hours_to_decay < 1:
+            return None
+        # 计算新值，确保不低于0
+        return (max(0, pet['satiety'] - SATIETY_DECAY_PER_HOUR * hours_to_decay),
+                max(0, pet['mood'] - MOOD_DECAY_PER_HOUR * hours_to_decay))
+
+    def _get_snapshot(self, user_id: str, group_id: str) -> tuple[dict, tuple[int, int] | None, dict[str, int]] | None:
+        """
+        一次联表查询取出 (宠物, 离线衰减, 背包)，没有宠物时返回 None。
+        衰减只计算不写入，由调用方在自己的写事务中通过 _write_decay 落盘。
+        """
+        query = """SELECT p.*, i.item_name AS item_name, i.quantity AS quantity
+                   FROM pets p LEFT JOIN inventory i ON i.user_id = p.user_id AND i.group_id = p.group_id
+                   WHERE p.user_id = ? AND p.group_id = ?"""
+        key = (int(user_id), int(group_id))
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(query, key).fetchall()
+            if not rows:
+                # 与 _get_pet 一致，回归玩家的归档宠物先移回主库
+                archiver = getattr(self.plugin, "pet_archiver", None)
+                if not archiver or not archiver.restore(conn, user_id, group_id):
+                    return None
+                conn.commit()
+                rows = conn.execute(query, key).fetchall()
+
+        pet = {name: rows[0][name] for name in rows[0].keys() if name not in ("item_name", "quantity")}
+        inventory = {row['item_name']: row['quantity'] for row in rows if row['item_name'] is not None}
+        return pet, self._decay(pet, datetime.now()), inventory
+
+    def _write_decay(self, conn, pet: dict, decay: tuple[int, int] | None):
+        """
+        在调用方的事务中写入快照计算出的离线衰减。
+        宠物已被其他写入修改时跳过，上次更新时间保持不变，衰减会在下次读取时重新计算。
+        """
+        if not decay:
+            return
+        cursor = conn.execute(
+            "UPDATE pets SET satiety = ?, mood = ?, last_updated_time = ?, version = version + 1 "
+            "WHERE user_id = ? AND group_id = ? AND version = ?",
+            (*decay, datetime.now().isoformat(), pet['user_id'], pet['group_id'], pet['version']))
+        if cursor.rowcount:
+            pet['satiety'], pet['mood'] = decay
+            pet['version'] += 1
+
+    def _get_group_pets(self, group_id: str, page: int) -> tuple[list[dict], int]:
+        """
+        一次查询取出群内某一页的宠物及群内宠物总数，并批量写回离线衰减。
+        与其他实例的写入冲突时跳过该宠物的衰减写回，只影响本次展示。
+        """
+        now = datetime.now()
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute(
+                """SELECT user_id, pet_name, pet_type, level, evolution_stage, attack, defense, satiety, mood,
+                          last_updated_time, version, COUNT(*) OVER () AS total
+                   FROM pets WHERE group_id = ?
+                   ORDER BY level DESC, user_id LIMIT ? OFFSET ?""",
+                (int(group_id), OVERVIEW_PAGE_SIZE, (page - 1) * OVERVIEW_PAGE_SIZE))
+            pets = [dict(row) for row in cursor.fetchall()]
+
+            updates = []
+            for pet in pets:
+                decayed = self._decay(pet, now)
+                if decayed:
+                    pet['satiety'], pet['mood'] = decayed
+                    updates.append((*decayed, now.isoformat(), pet['user_id'], int(group_id), pet['version']))
+            if updates:
+                cursor.executemany(
+                    "UPDATE pets SET satiety = ?, mood = ?, last_updated_time = ?, version = version + 1 "
+                    "WHERE user_id = ? AND group_id = ? AND version = ?", updates)
+                conn.commit()
+
+        return pets, pets[0]['total'] if pets else 0
+
+    def _get_user_pets(self, user_id: str) -> list[dict]:
+        """
+        一次查询取出玩家在所有群中的宠物与金钱，由覆盖索引 idx_pets_user_profile 直接提供。
+        已归档的宠物不在主库中，不会列出，玩家回到对应的群使用指令后即可恢复。
+        """
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute(
+                """SELECT group_id, pet_name, pet_type, level, evolution_stage, money
+                   FROM pets WHERE user_id = ? ORDER BY group_id""",
+                (int(user_id),))
+            return [dict(row) for row in cursor.fetchall()]
+
     def _exp_for_next_level(self, level: int) -> int:
         """计算升到下一级所需的总经验。"""
         return int(10 * (level ** 1.5))
         
-    def _check_level_up(self, user_id: str, group_id: str) -> list[str]:
+    async def _check_level_up(self, user_id: str, group_id: str) -> list[str]:
         """
         检查并处理宠物升级，此函数现在返回一个包含升级消息的列表，而不是直接发送。
         接收str类型的ID。
         """
+        def build(pet: dict):
+            exp_needed = self._exp_for_next_level(pet['level'])
+            if pet['exp'] < exp_needed:
+                return None
+            new_level = pet['level'] + 1
+            remaining_exp = pet['exp'] - exp_needed
+            new_attack = pet['attack'] + random.randint(*LEVEL_UP_STAT_GAIN)
+            new_defense = pet['defense'] + random.randint(*LEVEL_UP_STAT_GAIN)
+            return "level = ?, exp = ?, attack = ?, defense = ?", (new_level, remaining_exp, new_attack, new_defense)
+
         level_up_messages = []
         while True:
-            pet = self._get_pet(user_id, group_id)
-            if not pet:
+            # 调用时奖励已经提交，重试耗尽时保留已升的等级并交给下一次检查，不再向上抛出
+            try:
+                pet = await self._get_pet(user_id, group_id)
+                if not pet:
+                    break
+                # 写入基于读取时的版本号，其他实例抢先修改时会重新读取后再判断
+                pet = await self._versioned_update(user_id, group_id, pet, build)
+            except VersionConflict:
                 break
-
-            exp_needed = self._exp_for_next_level(pet['level'])
-            if pet['exp'] >= exp_needed:
-                new_level = pet['level'] + 1
-                remaining_exp = pet['exp'] - exp_needed
-                new_attack = pet['attack'] + random.randint(1, 2)
-                new_defense = pet['defense'] + random.randint(1, 2)
-
-                with sqlite3.connect(self.db_path) as conn:
-                    # 在更新数据库时，将str转换为int
-                    conn.execute(
-                        "UPDATE pets SET level = ?, exp = ?, attack = ?, defense = ? WHERE user_id = ? AND group_id = ?",
-                        (new_level, remaining_exp, new_attack, new_defense, int(user_id), int(group_id))
-                    )
-                    conn.commit()
-
-                level_up_messages.append(f"🎉 恭喜！你的宠物「{pet['pet_name']}」升级到了 Lv.{new_level}！")
-            else:
+            if not pet:
                 break
+            level_up_messages.append(f"🎉 恭喜！你的宠物「{pet['pet_name']}」升级到了 Lv.{pet['level'] + 1}！")
         return level_up_messages
         
     async def adopt_pet(self, event: object, pet_name: str | None = None):
@@ -201,7 +443,7 @@ class PetSystem:
             yield event.plain_result("该功能仅限群聊使用哦。")
             return
 
-        if self._get_pet(user_id, group_id):
+        if await self._get_pet(user_id, group_id):
             yield event.plain_result("你在这个群里已经有一只宠物啦！发送 /我的宠物 查看。")
             return
 
@@ -220,13 +462,13 @@ class PetSystem:
         cooldown_expired_time_iso = (now - timedelta(hours=2)).isoformat()
         now_iso = now.isoformat()
 
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.execute(
                 """INSERT INTO pets (user_id, group_id, pet_name, pet_type, attack, defense, 
-                                     last_fed_time, last_walk_time, last_duel_time, money) 
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                                     last_fed_time, last_walk_time, last_duel_time, money, last_active_time) 
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
                 (int(user_id), int(group_id), pet_name, type_name, stats['attack'], stats['defense'],
-                 now_iso, cooldown_expired_time_iso, cooldown_expired_time_iso, 50))
+                 now_iso, cooldown_expired_time_iso, cooldown_expired_time_iso, 50, now_iso))
             conn.commit()
 
         yield event.plain_result(
@@ -239,24 +481,58 @@ class PetSystem:
             yield event.plain_result("该功能仅限群聊使用哦。")
             return
 
-        pet = self._get_pet(user_id, group_id)
+        pet = await self._get_pet(user_id, group_id)
         if not pet:
             yield event.plain_result("你还没有宠物哦，快发送 /领养宠物 来选择一只吧！")
             return
 
-        result = self.plugin.image_generator._generate_pet_status_image(pet, event.get_sender_name())
+        result = await self.plugin.render_service.render_status_card(pet, event.get_sender_name())
         if isinstance(result, Path):
             yield event.image_result(str(result))
         else:
             yield event.plain_result(result)
             
+    async def group_overview(self, event: object, page: int = 1):
+        """以图片形式分页展示群内所有宠物"""
+        group_id = event.get_group_id()
+        if not group_id:
+            yield event.plain_result("该功能仅限群聊使用哦。")
+            return
+
+        page = max(1, page)
+        pets, total = self._get_group_pets(group_id, page)
+        if not pets:
+            yield event.plain_result("本群还没有宠物哦。" if page == 1 else f"第 {page} 页没有宠物了。")
+            return
+
+        pages = (total + OVERVIEW_PAGE_SIZE - 1) // OVERVIEW_PAGE_SIZE
+        result = await self.plugin.render_service.render_group_overview(group_id, pets, page, pages, total)
+        if isinstance(result, Path):
+            yield event.image_result(str(result))
+        else:
+            yield event.plain_result(result)
+
+    async def all_my_pets(self, event: object):
+        """以一张图片汇总查看自己在所有群中的宠物与金钱"""
+        user_id = event.get_sender_id()
+        pets = self._get_user_pets(user_id)
+        if not pets:
+            yield event.plain_result("你在任何群里都还没有宠物哦，快发送 /领养宠物 来选择一只吧！")
+            return
+
+        result = await self.plugin.render_service.render_player_profile(user_id, event.get_sender_name(), pets)
+        if isinstance(result, Path):
+            yield event.image_result(str(result))
+        else:
+            yield event.plain_result(result)
+
     async def evolve_pet(self, event: object):
         """让达到条件的宠物进化。"""
         user_id, group_id = event.get_sender_id(), event.get_group_id()
         if not group_id:
             return
 
-        pet = self._get_pet(user_id, group_id)
+        pet = await self._get_pet(user_id, group_id)
         if not pet:
             yield event.plain_result("你还没有宠物哦。")
             return
@@ -275,14 +551,22 @@ class PetSystem:
 
         next_evo_stage = pet['evolution_stage'] + 1
         next_evo_info = pet_type_info['evolutions'][next_evo_stage]
-        new_attack = pet['attack'] + random.randint(8, 15)
-        new_defense = pet['defense'] + random.randint(8, 15)
 
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                "UPDATE pets SET evolution_stage = ?, attack = ?, defense = ? WHERE user_id = ? AND group_id = ?",
-                (next_evo_stage, new_attack, new_defense, int(user_id), int(group_id)))
-            conn.commit()
+        def build(current: dict):
+            # 重试时重新确认仍满足进化条件，避免重复进化
+            if current['evolution_stage'] != pet['evolution_stage'] or current['level'] < evolve_level:
+                return None
+            new_attack = current['attack'] + random.randint(*EVOLUTION_STAT_GAIN)
+            new_defense = current['defense'] + random.randint(*EVOLUTION_STAT_GAIN)
+            return "evolution_stage = ?, attack = ?, defense = ?", (next_evo_stage, new_attack, new_defense)
+
+        try:
+            evolved = await self._versioned_update(user_id, group_id, pet, build)
+        except VersionConflict:
+            evolved = None
+        if not evolved:
+            yield event.plain_result(f"「{pet['pet_name']}」的状态刚刚发生了变化，请稍后再试。")
+            return
 
         yield event.plain_result(
             f"光芒四射！你的「{pet['pet_name']}」成功进化为了「{next_evo_info['name']}」！各项属性都得到了巨幅提升！")
\ No newline at end of file
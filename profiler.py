@@ -0,0 +1,114 @@
+import cProfile
+import io
+import pstats
+import random
+import tracemalloc
+from datetime import datetime
+
+class _Sampled:
+    """
+    逐步驱动一个可等待对象，只在它自身运行的区间内开启 cProfile。
+    协程挂起期间（等待渲染、重试退避等）事件循环上运行的其他协程不会被统计进来。
+    """
+    def __init__(self, awaitable, profile: cProfile.Profile):
+        self.awaitable = awaitable
+        self.profile = profile
+
+    def __await__(self):
+        value, error = None, None
+        while True:
+            self.profile.enable()
+            try:
+                if error is None:
+                    pending = self.awaitable.send(value)
+                else:
+                    pending = self.awaitable.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.profile.disable()
+            try:
+                value, error = (yield pending), None
+            except BaseException as e:
+                value, error = None, e
+
+class CommandProfiler:
+    """
+    可在运行时开关的指令级性能分析钩子。
+    对选中的指令按采样率启用 cProfile 与 tracemalloc，
+    每次调用输出一个 .prof 文件和一份内存分配摘要，关闭时只有一次集合查找的开销。
+    """
+    def __init__(self, plugin, commands: list[str] | None = None, sample_rate: float = 1.0,
+                 max_files: int = 200, top_allocations: int = 15):
+        self.plugin = plugin
+        self.output_dir = plugin.data_dir / "profiles"
+        self.enabled_commands: set[str] = set(commands or [])
+        self.sample_rate = sample_rate
+        self.max_files = max_files
+        self.top_allocations = top_allocations
+        # cProfile 与 tracemalloc 都是进程级的，同一时刻只分析一次调用
+        self._active = False
+
+    def enable(self, commands: list[str], sample_rate: float | None = None):
+        """为指定指令开启性能分析。"""
+        self.enabled_commands.update(commands)
+        if sample_rate is not None:
+            self.sample_rate = max(0.0, min(1.0, sample_rate))
+
+    def disable(self, commands: list[str] | None = None):
+        """关闭指定指令的性能分析，未指定时全部关闭。"""
+        if commands is None:
+            self.enabled_commands.clear()
+        else:
+            self.enabled_commands.difference_update(commands)
+
+    def wrap(self, command: str, agen):
+        """包装指令处理函数返回的异步生成器，未开启或未命中采样时原样返回。"""
+        if command not in self.enabled_commands or self._active:
+            return agen
+        if random.random() >= self.sample_rate:
+            return agen
+        # 在返回前就占用分析名额：按群执行模式下多条指令可能先被包装、稍后才开始执行
+        self._active = True
+        return self._profiled(command, agen)
+
+    async def _profiled(self, command: str, agen):
+        profile = cProfile.Profile()
+        # 其他人已经开启的 tracemalloc 不能被这里停止
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        snapshot_before = tracemalloc.take_snapshot()
+        try:
+            while True:
+                # cProfile 只统计处理函数自身执行的区间；内存分配按进程统计，挂起期间其他协程的分配也会计入
+                try:
+                    result = await _Sampled(agen.__anext__(), profile)
+                except StopAsyncIteration:
+                    break
+                yield result
+        finally:
+            snapshot_after = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+            self._active = False
+            self._write_reports(command, profile, snapshot_before, snapshot_after)
+
+    def _write_reports(self, command: str, profile: cProfile.Profile,
+                       snapshot_before: tracemalloc.Snapshot, snapshot_after: tracemalloc.Snapshot):
+        """写出 .prof 文件与内存分配摘要，并清理超出上限的旧文件。"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stem = f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{command}"
+        profile.dump_stats(str(self.output_dir / f"{stem}.prof"))
+
+        stream = io.StringIO()
+        stream.write(f"指令: {command}\n\n--- 内存分配 Top {self.top_allocations} ---\n")
+        for stat in snapshot_after.compare_to(snapshot_before, "lineno")[:self.top_allocations]:
+            stream.write(f"{stat}\n")
+        stream.write("\n--- 累计耗时 Top 20 ---\n")
+        pstats.Stats(profile, stream=stream).sort_stats("cumulative").print_stats(20)
+        (self.output_dir / f"{stem}.txt").write_text(stream.getvalue(), encoding="utf-8")
+
+        files = sorted(self.output_dir.iterdir(), key=lambda path: path.stat().st_mtime)
+        for path in files[:max(0, len(files) - self.max_files)]:
+            path.unlink(missing_ok=True)
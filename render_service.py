@@ -0,0 +1,177 @@
+import asyncio
+import multiprocessing
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from .image_generator import (CardAssets, render_status_card, render_battle_card, render_group_overview,
+                              render_player_profile)
+
+try:
+    from astrbot.api import logger
+except ImportError:
+    class DummyLogger:
+        def error(self, msg):
+            print(f"[ERROR] {msg}")
+
+        def warning(self, msg):
+            print(f"[WARNING] {msg}")
+    logger = DummyLogger()
+
+# 渲染任务类型 -> 绘制函数
+RENDERERS = {
+    "status": render_status_card,
+    "battle": render_battle_card,
+    "overview": render_group_overview,
+    "profile": render_player_profile,
+}
+
+# --- 渲染进程内的素材缓存，由进程池初始化函数加载 ---
+_worker_assets: CardAssets | None = None
+
+def _init_render_worker(assets_dir: str):
+    """进程池初始化：预加载背景、字体与全部立绘，之后的任务直接复用。"""
+    global _worker_assets
+    _worker_assets = CardAssets(Path(assets_dir))
+    _worker_assets.warm_up()
+
+def _render_job(kind: str, job: dict) -> str:
+    """在渲染进程中执行一次绘制任务，返回输出文件路径。"""
+    if kind not in RENDERERS:
+        raise ValueError(f"未知的渲染任务: {kind}")
+    return str(RENDERERS[kind](_worker_assets, **job))
+
+class RenderService:
+    """
+    卡片渲染服务。
+    把 Pillow 绘制任务交给一个小型进程池，避免阻塞事件循环；
+    父进程负责限制排队任务数量与超时，进程池不可用时退回到进程内绘制。
+    渲染进程以 spawn 方式启动：宿主进程是多线程的，fork 出的子进程可能继承其他线程持有的锁而卡死。
+    """
+    def __init__(self, plugin, workers: int = 2, max_pending: int = 8, timeout: float = 10.0):
+        self.plugin = plugin
+        self.assets_dir = plugin.assets_dir
+        self.workers = workers
+        self.timeout = timeout
+        self.max_pending = max_pending
+        # 每个事件循环各自的排队名额
+        self._slots: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_render_worker,
+                initargs=(str(self.assets_dir),),
+            )
+        return self._executor
+
+    async def _submit(self, kind: str, job: dict) -> Path | str:
+        """提交渲染任务；排队已满或超时时返回错误信息字符串。"""
+        if self.workers <= 0:
+            return self._render_inline(kind, job)
+
+        # 渲染可能要等待数秒，不占用所在群 actor 的队列
+        self.plugin.group_actors.release()
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = self._slots[loop] = asyncio.Semaphore(self.max_pending)
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            return "图片生成繁忙，请稍后再试。"
+
+        holds_slot = True
+        try:
+            executor = self._get_executor()
+            future = executor.submit(_render_job, kind, job)
+            # 名额一直占用到渲染进程真正完成：超时返回后仍在绘制的任务也计入排队数量
+            future.add_done_callback(lambda _: self._release_slot(loop, slots))
+            holds_slot = False
+            return Path(await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=self.timeout))
+        except asyncio.TimeoutError:
+            logger.error(f"渲染任务超时: {kind}")
+            return "图片生成超时，请稍后再试。"
+        except BrokenProcessPool:
+            # 渲染进程异常退出，重建进程池并在本进程内完成这次绘制
+            logger.warning("渲染进程池已损坏，正在重建。")
+            # 先关闭损坏的进程池，回收它的管理线程与残留进程；并发的任务可能已经换上了新的进程池
+            executor.shutdown(wait=False, cancel_futures=True)
+            if self._executor is executor:
+                self._executor = None
+            return self._render_inline(kind, job)
+        except Exception as e:
+            logger.error(f"生成图片时发生未知错误: {e}")
+            return f"生成图片时发生未知错误: {e}"
+        finally:
+            if holds_slot:
+                slots.release()
+
+    @staticmethod
+    def _release_slot(loop: asyncio.AbstractEventLoop, slots: asyncio.Semaphore):
+        """在渲染任务结束时（可能位于进程池的管理线程中）归还排队名额。"""
+        try:
+            loop.call_soon_threadsafe(slots.release)
+        except RuntimeError:
+            # 事件循环已关闭
+            pass
+
+    def _render_inline(self, kind: str, job: dict) -> Path | str:
+        generator = self.plugin.image_generator
+        try:
+            return RENDERERS[kind](generator._get_assets(), **job)
+        except Exception as e:
+            logger.error(f"生成图片时发生未知错误: {e}")
+            return f"生成图片时发生未知错误: {e}"
+
+    async def render_status_card(self, pet_data: dict, sender_name: str) -> Path | str:
+        """渲染宠物状态卡，成功返回文件路径(Path)，失败返回错误信息字符串(str)。"""
+        generator = self.plugin.image_generator
+        return await self._submit("status", {
+            "pet_data": pet_data,
+            "sender_name": sender_name,
+            "exp_for_level": self.plugin.pet_system._exp_for_next_level(pet_data['level']),
+            "output_path": generator._status_image_path(pet_data),
+        })
+
+    async def render_battle_card(self, group_id: str, user_id: str, challenger_pet: dict, target_pet: dict,
+                                 winner_name: str, summary: list[str]) -> Path | str:
+        """渲染对决结果卡，成功返回文件路径(Path)，失败返回错误信息字符串(str)。"""
+        generator = self.plugin.image_generator
+        return await self._submit("battle", {
+            "challenger_pet": challenger_pet,
+            "target_pet": target_pet,
+            "winner_name": winner_name,
+            "summary": summary,
+            "output_path": generator._battle_image_path(group_id, user_id),
+        })
+
+    async def render_group_overview(self, group_id: str, pets: list[dict], page: int, pages: int,
+                                    total: int) -> Path | str:
+        """渲染群宠物总览的一页，成功返回文件路径(Path)，失败返回错误信息字符串(str)。"""
+        generator = self.plugin.image_generator
+        return await self._submit("overview", {
+            "pets": pets,
+            "page": page,
+            "pages": pages,
+            "total": total,
+            "output_path": generator._overview_image_path(group_id, page),
+        })
+
+    async def render_player_profile(self, user_id: str, owner_name: str, pets: list[dict]) -> Path | str:
+        """渲染玩家的跨群宠物卡片，成功返回文件路径(Path)，失败返回错误信息字符串(str)。"""
+        generator = self.plugin.image_generator
+        return await self._submit("profile", {
+            "owner_name": owner_name,
+            "pets": pets,
+            "output_path": generator._profile_image_path(user_id),
+        })
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
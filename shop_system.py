@@ -1,7 +1,12 @@
-import sqlite3
 import random
 from datetime import datetime, timedelta
 
+try:
+    from astrbot.api.event import AstrMessageEvent
+except ImportError:
+    # 脱离 AstrBot 运行（例如压力测试工具）时使用的最小替代
+    AstrMessageEvent = object
+
 # --- 静态游戏数据定义 (商店) ---
 SHOP_ITEMS = {
     "普通口粮": {"price": 10, "type": "food", "satiety": 20, "mood": 5, "description": "能快速填饱肚子的基础食物。"},
@@ -31,22 +36,24 @@ class ShopSystem:
     async def backpack(self, event: AstrMessageEvent):
         """显示你的宠物背包中的物品。"""
         user_id, group_id = event.get_sender_id(), event.get_group_id()
-        if not self.plugin.pet_system._get_pet(user_id, group_id):
+        pet_system = self.plugin.pet_system
+        snapshot = pet_system._get_snapshot(user_id, group_id)
+        if not snapshot:
             yield event.plain_result("你还没有宠物，自然也没有背包啦。")
             return
 
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT item_name, quantity FROM inventory WHERE user_id = ? AND group_id = ?",
-                           (int(user_id), int(group_id)))
-            items = cursor.fetchall()
+        pet, decay, inventory = snapshot
+        if decay:
+            with pet_system._connect() as conn:
+                pet_system._write_decay(conn, pet, decay)
+                conn.commit()
 
-        if not items:
+        if not inventory:
             yield event.plain_result("你的背包空空如也，去商店看看吧！")
             return
 
         reply = f"{event.get_sender_name()}的背包:\n--------------------\n"
-        for item_name, quantity in items:
+        for item_name, quantity in inventory.items():
             reply += f"【{item_name}】 x {quantity}\n"
         yield event.plain_result(reply)
         
@@ -58,18 +65,22 @@ class ShopSystem:
             yield event.plain_result(f"商店里没有「{item_name}」这种东西。")
             return
 
-        if not self.plugin.pet_system._get_pet(user_id, group_id):
+        pet_system = self.plugin.pet_system
+        snapshot = pet_system._get_snapshot(user_id, group_id)
+        if not snapshot:
             yield event.plain_result("你还没有宠物，无法购买物品。")
             return
 
+        pet, decay, _ = snapshot
         item_info = SHOP_ITEMS[item_name]
         total_cost = item_info['price'] * quantity
 
-        with sqlite3.connect(self.db_path) as conn:
+        with pet_system._connect() as conn:
+            pet_system._write_decay(conn, pet, decay)
             cursor = conn.cursor()
 
             cursor.execute(
-                "UPDATE pets SET money = money - ? WHERE user_id = ? AND group_id = ? AND money >= ?",
+                "UPDATE pets SET money = money - ?, version = version + 1 WHERE user_id = ? AND group_id = ? AND money >= ?",
                 (total_cost, int(user_id), int(group_id), total_cost)
             )
 
@@ -86,13 +97,17 @@ class ShopSystem:
 
             conn.commit()
 
+        self.plugin.economy_ledger.record(user_id, group_id, "purchase", money_delta=-total_cost,
+                                          item_name=item_name, item_delta=quantity)
+
         yield event.plain_result(f"购买成功！你花费 ${total_cost} 购买了 {quantity} 个「{item_name}」。")
         
     async def feed_pet_item(self, event: AstrMessageEvent, item_name: str):
         """从背包中使用食物投喂宠物"""
         user_id, group_id = event.get_sender_id(), event.get_group_id()
-        pet = self.plugin.pet_system._get_pet(user_id, group_id)
-        if not pet:
+        pet_system = self.plugin.pet_system
+        snapshot = pet_system._get_snapshot(user_id, group_id)
+        if not snapshot:
             yield event.plain_result("你还没有宠物，不能进行投喂哦。")
             return
 
@@ -100,7 +115,14 @@ class ShopSystem:
             yield event.plain_result(f"「{item_name}」不是可以投喂的食物。")
             return
 
-        with sqlite3.connect(self.db_path) as conn:
+        pet, decay, inventory = snapshot
+        if not inventory.get(item_name):
+            yield event.plain_result(f"你的背包里没有「{item_name}」。")
+            return
+
+        with pet_system._connect() as conn:
+            # 衰减与投喂在同一事务中写入，投喂的加成叠加在衰减之后
+            pet_system._write_decay(conn, pet, decay)
             cursor = conn.cursor()
 
             cursor.execute(
@@ -117,7 +139,7 @@ class ShopSystem:
             mood_gain = item_info.get('mood', 0)
 
             cursor.execute(
-                "UPDATE pets SET satiety = MIN(100, satiety + ?), mood = MIN(100, mood + ?) WHERE user_id = ? AND group_id = ?",
+                "UPDATE pets SET satiety = MIN(100, satiety + ?), mood = MIN(100, mood + ?), version = version + 1 WHERE user_id = ? AND group_id = ?",
                 (satiety_gain, mood_gain, int(user_id), int(group_id))
             )
 
@@ -127,6 +149,8 @@ class ShopSystem:
 
             conn.commit()
 
+        self.plugin.economy_ledger.record(user_id, group_id, "feed", item_name=item_name, item_delta=-1)
+
         satiety_chinese = STAT_MAP.get('satiety', '饱食度')
         mood_chinese = STAT_MAP.get('mood', '心情值')
         yield event.plain_result(